@@ -0,0 +1,65 @@
+"""
+Fetch thousands of urls with a pool of threads.
+
+`requests.get` opens a new connection for every request.
+Here all the threads share one `requests.Session` whose `HTTPAdapter`
+keeps up to `pool_size` connections per host open, so after the first
+request to a host we skip the TCP (and TLS) handshake.
+The GIL is released while a thread waits on its socket,
+so the threads overlap their network waits.
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_status(session: requests.Session, url: str) -> int:
+    with session.get(url) as response:
+        return response.status_code
+
+
+def fetch_all(
+    urls: Iterable[str], threads: int = 10, pool_size: int = 10
+) -> Iterator[Tuple[str, Union[int, Exception]]]:
+    """
+    Yield `(url, status code or exception)` as soon as each request finishes.
+    We submit only a few requests more than we have threads,
+    so memory doesn't grow with the number of urls
+    """
+    urls = iter(urls)
+    with create_session(pool_size) as session, ThreadPoolExecutor(
+        max_workers=threads
+    ) as executor:
+        in_flight = {}
+
+        def submit(count: int) -> None:
+            for url in urls:
+                in_flight[executor.submit(fetch_status, session, url)] = url
+                count -= 1
+                if not count:
+                    break
+
+        submit(2 * threads)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = in_flight.pop(future)
+                exception = future.exception()
+                yield url, future.result() if exception is None else exception
+            submit(len(done))
+
+
+if __name__ == "__main__":
+    urls = ["https://www.google.com", "https://www.python.org"] * 10
+    for url, status in fetch_all(urls, threads=4, pool_size=4):
+        print(f"{url}: {status}")
@@ -0,0 +1,85 @@
+"""
+Throughput of `batch_fetcher.fetch_all` for different numbers of threads
+and connection pool sizes, against a local `http.server` so no network is
+needed, compared with a plain `requests.get` per url.
+
+    python -m ch01.batch_fetcher_benchmark --urls 2000
+"""
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter, sleep
+from typing import List
+
+import requests
+
+from ch01.batch_fetcher import fetch_all
+
+ADDRESS = ("127.0.0.1", 8003)
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    # keep the connections alive between requests
+    protocol_version = "HTTP/1.1"
+    # the headers and the body are two writes, without this the second one
+    # waits for the client's delayed ACK on a kept alive connection
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def run_server() -> None:
+    ThreadingHTTPServer(ADDRESS, OkHandler).serve_forever()
+
+
+def requests_without_session(urls: List[str], threads: int) -> None:
+    def get(url: str) -> int:
+        return requests.get(url).status_code
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(get, urls))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=run_server, daemon=True)
+    server.start()
+    sleep(0.5)
+    urls = [f"http://{ADDRESS[0]}:{ADDRESS[1]}/{i}" for i in range(args.urls)]
+    print(f"{'mode':<16} {'threads':>7} {'pool size':>9} {'requests/sec':>13}")
+    try:
+        for threads in args.threads:
+            start = perf_counter()
+            requests_without_session(urls, threads)
+            throughput = len(urls) / (perf_counter() - start)
+            print(
+                f"{'requests.get':<16} {threads:>7} {'-':>9} {throughput:>13.0f}"
+            )
+            for pool_size in args.pool_sizes:
+                start = perf_counter()
+                for _ in fetch_all(urls, threads, pool_size):
+                    pass
+                throughput = len(urls) / (perf_counter() - start)
+                print(
+                    f"{'pooled session':<16} {threads:>7} {pool_size:>9}"
+                    f" {throughput:>13.0f}"
+                )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare the threading and the non-threading variants of the `ch01` demos
+with `tools.benchmark`, and check them against a stored baseline.
+
+    python -m ch01.benchmark --suite fib --save baseline.json
+    python -m ch01.benchmark --suite fib --baseline baseline.json
+"""
+import argparse
+import sys
+from typing import Callable, Dict, List, Tuple
+
+from ch01 import gil_released_demo, thread_issue_demo
+from ch01.tools import (
+    benchmark,
+    compare_to_baseline,
+    print_results,
+    save_results,
+)
+
+SUITES: Dict[str, List[Tuple[Callable, tuple]]] = {
+    "fib": [
+        (thread_issue_demo.fib_with_no_threading, (25,)),
+        (thread_issue_demo.fib_with_threading, (25,)),
+    ],
+    "requests": [
+        (gil_released_demo.requests_no_threading, ()),
+        (gil_released_demo.requests_with_threading, ()),
+    ],
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--suite", choices=SUITES, default="fib")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--save", help="write the results to this json file")
+    parser.add_argument("--baseline", help="compare with this json file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="slowdown of the median we accept before flagging a regression",
+    )
+    args = parser.parse_args()
+
+    results = [
+        benchmark(fn, *fn_args, warmup=args.warmup, repeat=args.repeat)
+        for fn, fn_args in SUITES[args.suite]
+    ]
+    print_results(results)
+    if args.save:
+        save_results(results, args.save)
+    if args.baseline:
+        regressions = compare_to_baseline(
+            results, args.baseline, args.tolerance
+        )
+        if regressions:
+            print(f"Regressions: {regressions}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare the ways we have to calculate fibonacci numbers:
+threads, processes and the iterative engine.
+
+Every run calculates `fib(number)` once per worker of the largest pool,
+so with more workers than cores the work stays the same while the
+processes (but not the threads) run it in parallel.
+
+    python -m ch01.fib_comparison --numbers 25 30 35
+"""
+import argparse
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List
+
+from ch01.thread_issue_demo import fib, fib_iterative
+from ch01.tools import benchmark
+
+
+def fib_in_executor(executor: Executor, numbers: List[int]) -> None:
+    list(executor.map(fib, numbers))
+
+
+def fib_iteratively(numbers: List[int]) -> None:
+    for number in numbers:
+        fib_iterative(number)
+
+
+def compare(number: int, max_workers: int, repeat: int) -> List[Dict]:
+    numbers = [number] * max_workers
+    rows = []
+    for workers in range(1, max_workers + 1):
+        for mode, executor_class in {
+            "threads": ThreadPoolExecutor,
+            "processes": ProcessPoolExecutor,
+        }.items():
+            # don't measure the start-up of the pool
+            with executor_class(max_workers=workers) as executor:
+                result = benchmark(
+                    fib_in_executor, executor, numbers, warmup=1, repeat=repeat
+                )
+            rows.append({"mode": mode, "workers": workers, **result})
+    result = benchmark(fib_iteratively, numbers, warmup=1, repeat=repeat)
+    rows.append({"mode": "iterative", "workers": 1, **result})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--numbers", type=int, nargs="+", default=list(range(25, 36, 5))
+    )
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'n':>3} {'mode':<10} {'workers':>7} {'median ms':>11} {'speedup':>8}"
+    )
+    for number in args.numbers:
+        rows = compare(number, args.max_workers, args.repeat)
+        # against a single thread doing all the work
+        baseline = rows[0]["median_ns"]
+        for row in rows:
+            print(
+                f"{number:>3} {row['mode']:<10} {row['workers']:>7}"
+                f" {row['median_ns'] / 1e6:>11.3f}"
+                f" {baseline / row['median_ns']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 """
 Simple demo to show that due to `GIL`
 even if we have two threads we aren't able to speed up the calculation process
-because only on python process can execute python byte code
+because only on python process can execute python byte code.
+With processes each one has its own `GIL`, so they can run in parallel.
 """
+import asyncio
 import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional
 
 from ch01.tools import time_it
 
@@ -31,6 +35,43 @@ def fib_with_threading(number: int) -> None:
     thread_2.join()
 
 
+@time_it
+def fib_with_processes(number: int, workers: int = 2) -> None:
+    """
+    Calculates number, number+1 in a pool of processes
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(fib, [number, number + 1]))
+
+
+async def fib_with_executor(
+    number: int, executor: Optional[Executor] = None
+) -> List[int]:
+    """
+    Offloads number, number+1 to an executor (the default thread pool if None),
+    so the event loop is free to run other tasks while they are calculated
+    """
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        loop.run_in_executor(executor, fib, number),
+        loop.run_in_executor(executor, fib, number + 1),
+    )
+
+
+async def heartbeat(interval: float = 0.5) -> None:
+    while True:
+        print("The event loop is still responsive")
+        await asyncio.sleep(interval)
+
+
+async def main_with_executor(number: int) -> None:
+    heartbeat_task = asyncio.create_task(heartbeat())
+    with ProcessPoolExecutor() as executor:
+        results = await fib_with_executor(number, executor)
+    heartbeat_task.cancel()
+    print(f"Results: {results}")
+
+
 def fib(number: int) -> int:
     """
     Recursive fibonacci calculation.
@@ -43,7 +84,22 @@ def fib(number: int) -> int:
         return fib(number - 1) + fib(number - 2)
 
 
+def fib_iterative(number: int) -> int:
+    """
+    Same numbers as `fib` in O(n) additions instead of O(2^n) calls,
+    and without the recursion limit, so it can be used for a large `number`
+    """
+    if number <= 1:
+        return 0
+    previous, current = 0, 1
+    for _ in range(number - 2):
+        previous, current = current, previous + current
+    return current
+
+
 if __name__ == "__main__":
     n = 10
     fib_with_threading(n)
     fib_with_no_threading(n)
+    fib_with_processes(n)
+    asyncio.run(main_with_executor(30))
@@ -1,8 +1,14 @@
+import asyncio
+import inspect
+import json
+import statistics
+from functools import wraps
 from time import perf_counter_ns
-from typing import Any, Callable
+from typing import Any, Callable, Dict, List
 
 
 def time_it(fn: Callable) -> Callable:
+    @wraps(fn)
     def inner(*args, **kwargs) -> Any:
         now = perf_counter_ns()
         print(f"Calling `{fn.__name__}` with {args}")
@@ -12,3 +18,109 @@ def time_it(fn: Callable) -> Callable:
         return result
 
     return inner
+
+
+def collect_samples(
+    fn: Callable, args: tuple, kwargs: dict, warmup: int, repeat: int
+) -> List[int]:
+    for _ in range(warmup):
+        fn(*args, **kwargs)
+    samples = []
+    for _ in range(repeat):
+        now = perf_counter_ns()
+        fn(*args, **kwargs)
+        samples.append(perf_counter_ns() - now)
+    return samples
+
+
+async def collect_async_samples(
+    fn: Callable, args: tuple, kwargs: dict, warmup: int, repeat: int
+) -> List[int]:
+    for _ in range(warmup):
+        await fn(*args, **kwargs)
+    samples = []
+    for _ in range(repeat):
+        now = perf_counter_ns()
+        await fn(*args, **kwargs)
+        samples.append(perf_counter_ns() - now)
+    return samples
+
+
+def reject_outliers(samples: List[int], k: float = 1.5) -> List[int]:
+    """
+    Drop the samples outside of the `k` * IQR fences (Tukey's rule),
+    e.g. a round where the OS scheduled something else on our core
+    """
+    if len(samples) < 4:
+        return samples
+    q1, _, q3 = statistics.quantiles(samples, n=4)
+    low, high = q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+    return [sample for sample in samples if low <= sample <= high]
+
+
+def benchmark(
+    fn: Callable, *args, warmup: int = 2, repeat: int = 10, **kwargs
+) -> Dict:
+    """
+    Run `fn(*args, **kwargs)` (a function or a coroutine function)
+    `warmup` + `repeat` times and summarize the `repeat` timings in nanoseconds
+    """
+    # skip the prints of `time_it`
+    fn = inspect.unwrap(fn)
+    if inspect.iscoroutinefunction(fn):
+        samples = asyncio.run(
+            collect_async_samples(fn, args, kwargs, warmup, repeat)
+        )
+    else:
+        samples = collect_samples(fn, args, kwargs, warmup, repeat)
+    kept = reject_outliers(samples)
+    return {
+        "name": f"{fn.__name__}{args}",
+        "samples": len(samples),
+        "rejected": len(samples) - len(kept),
+        "mean_ns": statistics.mean(kept),
+        "stddev_ns": statistics.stdev(kept) if len(kept) > 1 else 0.0,
+        "median_ns": statistics.median(kept),
+    }
+
+
+def print_results(results: List[Dict]) -> None:
+    print(
+        f"{'benchmark':<40} {'mean ms':>10} {'stddev ms':>10}"
+        f" {'median ms':>10} {'rejected':>9}"
+    )
+    for result in results:
+        print(
+            f"{result['name']:<40} {result['mean_ns'] / 1e6:>10.3f}"
+            f" {result['stddev_ns'] / 1e6:>10.3f}"
+            f" {result['median_ns'] / 1e6:>10.3f}"
+            f" {result['rejected']:>4}/{result['samples']:<4}"
+        )
+
+
+def save_results(results: List[Dict], path: str) -> None:
+    with open(path, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+
+
+def compare_to_baseline(
+    results: List[Dict], baseline_path: str, tolerance: float = 0.1
+) -> List[str]:
+    """
+    The benchmarks whose median is more than `tolerance` slower
+    than the one stored in the baseline
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = {
+            result["name"]: result for result in json.load(baseline_file)
+        }
+    regressions = []
+    for result in results:
+        if result["name"] not in baseline:
+            continue
+        before = baseline[result["name"]]["median_ns"]
+        change = result["median_ns"] / before - 1
+        print(f"{result['name']:<40} {change:>+8.1%}")
+        if change > tolerance:
+            regressions.append(result["name"])
+    return regressions
@@ -0,0 +1,179 @@
+"""
+Complete asyncio futures from worker threads, in batches.
+
+In `future_demo.py` a task sets the result of the future, but results
+often come from threads, and a thread must not touch a future directly:
+it asks the loop with `loop.call_soon_threadsafe(future.set_result, ...)`
+(that's what `run_in_executor`/`wrap_future` do for us). Every call writes
+to the loop's self-pipe to wake it up, one syscall and one loop wakeup
+per result.
+
+The bridge puts the results of all the threads in one list and wakes the
+loop up only for the first one, the loop then completes the futures that
+are in the list when it gets to it, up to `max_batch` of them:
+one wakeup per batch, and the busier the threads the bigger the batches.
+The results that arrive while the loop works on a batch go to the next one,
+so that the other callbacks of the loop (the tasks we just completed,
+for a start) get their turn in between.
+
+Cancellation works both ways:
+- the loop cancels the future: `completion.cancelled()` is `True`,
+  so the thread can stop working on it (and a job that didn't start yet
+  is dropped from the executor)
+- the thread calls `completion.cancel()`: the future is cancelled
+
+    bridge = FutureBridge()
+    future, completion = bridge.create_future()
+    threading.Thread(target=work, args=(completion,)).start()
+    await future
+"""
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, Optional, Tuple
+
+
+class Completion:
+    """
+    The thread side of a future
+    """
+
+    __slots__ = ("bridge", "future", "cancel_requested")
+
+    def __init__(self, bridge: "FutureBridge", future: asyncio.Future):
+        self.bridge = bridge
+        self.future = future
+        self.cancel_requested = False
+
+    def set_result(self, result: Any) -> None:
+        self.bridge.complete(self.future.set_result, result)
+
+    def set_exception(self, exception: BaseException) -> None:
+        self.bridge.complete(self.future.set_exception, exception)
+
+    def cancel(self) -> None:
+        self.bridge.complete(self.future.cancel, None)
+
+    def cancelled(self) -> bool:
+        """
+        Did the loop cancel the future
+        """
+        return self.cancel_requested
+
+
+class FutureBridge:
+    def __init__(
+        self,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        max_batch: int = 1024,
+    ):
+        self.loop = loop or asyncio.get_running_loop()
+        self.max_batch = max_batch
+        # (bound method of the future, argument) waiting for the next flush,
+        # `deque.append` and `popleft` are thread safe
+        self.pending: Deque[Tuple[Callable, Any]] = deque()
+        self.scheduled = False
+        self.wakeups = 0
+        self.batches = 0
+        self.completions = 0
+
+    def create_future(self) -> Tuple[asyncio.Future, Completion]:
+        """
+        Call it in the loop, then hand the `Completion` to a thread
+        """
+        future = self.loop.create_future()
+        completion = Completion(self, future)
+
+        def on_done(done: asyncio.Future) -> None:
+            if done.cancelled():
+                completion.cancel_requested = True
+
+        future.add_done_callback(on_done)
+        return future, completion
+
+    def complete(self, method: Callable, argument: Any) -> None:
+        """
+        Called from the threads, only the first completion of a batch
+        wakes the loop up
+        """
+        self.pending.append((method, argument))
+        if not self.scheduled:
+            # two threads can both get here, that's one extra (empty) flush
+            self.scheduled = True
+            self.loop.call_soon_threadsafe(self.flush)
+
+    def flush(self, woken: bool = True) -> None:
+        # before draining: a thread that appends after it sees `False` and
+        # schedules the next flush, one that saw `True` appended before it
+        self.scheduled = False
+        if woken:
+            self.wakeups += 1
+        self.batches += 1
+        pending = self.pending
+        # only what is there now, the threads keep appending while we work
+        for _ in range(min(len(pending), self.max_batch)):
+            method, argument = pending.popleft()
+            self.completions += 1
+            # the loop may have cancelled the future in the meantime
+            if method.__self__.done():
+                continue
+            try:
+                method(argument)
+            except Exception as ex:
+                # e.g. `set_exception(StopIteration())`, fail this one
+                # completion and keep draining the batch
+                self.loop.call_exception_handler(
+                    {
+                        "message": "Exception completing a future",
+                        "exception": ex,
+                        "future": method.__self__,
+                    }
+                )
+        if pending and not self.scheduled:
+            # more than `max_batch` were waiting: the rest after the
+            # callbacks that are ready, no need to wake the loop up for it
+            self.scheduled = True
+            self.loop.call_soon(self.flush, False)
+
+    def submit(
+        self, executor: Executor, func: Callable, *args
+    ) -> asyncio.Future:
+        """
+        `run_in_executor` through the bridge
+        """
+        future, completion = self.create_future()
+        job = executor.submit(run, completion, func, *args)
+        future.add_done_callback(
+            lambda done: job.cancel() if done.cancelled() else None
+        )
+        return future
+
+
+def run(completion: Completion, func: Callable, *args) -> None:
+    if completion.cancelled():
+        return
+    try:
+        result = func(*args)
+    except BaseException as ex:
+        completion.set_exception(ex)
+    else:
+        completion.set_result(result)
+
+
+async def main():
+    bridge = FutureBridge()
+    future, completion = bridge.create_future()
+    threading.Timer(1, completion.set_result, args=(42,)).start()
+    print(f"Is the future done?: {future.done()}")
+    print(await future)
+
+    future, completion = bridge.create_future()
+    future.cancel()
+    # the done callbacks run on the next iteration of the loop
+    await asyncio.sleep(0)
+    print(f"Does the thread see the cancellation?: {completion.cancelled()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
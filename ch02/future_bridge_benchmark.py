@@ -0,0 +1,133 @@
+"""
+Completions/sec and loop wakeups when `threads` threads complete `results`
+futures, one `call_soon_threadsafe` per result against `FutureBridge`,
+then `run_in_executor` (`wrap_future`) against `FutureBridge.submit`.
+
+A wakeup is a write to the loop's self-pipe, a batch is one `flush` of the
+bridge: at most `max_batch` completions between two turns of the loop.
+
+    python -m ch02.future_bridge_benchmark --results 100000 --threads 4
+"""
+import argparse
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Callable, List, Optional, Tuple
+
+from ch02.future_bridge import FutureBridge
+
+
+def count_wakeups(loop: asyncio.AbstractEventLoop) -> List[int]:
+    # `call_soon_threadsafe` wakes the loop up with `_write_to_self`
+    wakeups = [0]
+    write_to_self = loop._write_to_self
+
+    def counting_write_to_self() -> None:
+        wakeups[0] += 1
+        write_to_self()
+
+    loop._write_to_self = counting_write_to_self
+    return wakeups
+
+
+def start_threads(threads: int, target: Callable, items: List) -> None:
+    for index in range(threads):
+        threading.Thread(target=target, args=(items[index::threads],)).start()
+
+
+async def per_result(
+    results: int, threads: int
+) -> Tuple[float, int, Optional[int]]:
+    loop = asyncio.get_running_loop()
+    wakeups = count_wakeups(loop)
+    futures = [loop.create_future() for _ in range(results)]
+
+    def complete(futures: List[asyncio.Future]) -> None:
+        for number, future in enumerate(futures):
+            loop.call_soon_threadsafe(future.set_result, number)
+
+    start = perf_counter()
+    start_threads(threads, complete, futures)
+    await asyncio.gather(*futures)
+    return perf_counter() - start, wakeups[0], None
+
+
+async def bridged(
+    results: int, threads: int
+) -> Tuple[float, int, Optional[int]]:
+    loop = asyncio.get_running_loop()
+    wakeups = count_wakeups(loop)
+    bridge = FutureBridge()
+    futures, completions = zip(
+        *[bridge.create_future() for _ in range(results)]
+    )
+
+    def complete(completions: List) -> None:
+        for number, completion in enumerate(completions):
+            completion.set_result(number)
+
+    start = perf_counter()
+    start_threads(threads, complete, list(completions))
+    await asyncio.gather(*futures)
+    return perf_counter() - start, wakeups[0], bridge.batches
+
+
+def square(number: int) -> int:
+    return number * number
+
+
+async def run_in_executor(
+    results: int, threads: int
+) -> Tuple[float, int, Optional[int]]:
+    loop = asyncio.get_running_loop()
+    wakeups = count_wakeups(loop)
+    with ThreadPoolExecutor(threads) as executor:
+        start = perf_counter()
+        await asyncio.gather(
+            *[
+                loop.run_in_executor(executor, square, number)
+                for number in range(results)
+            ]
+        )
+        return perf_counter() - start, wakeups[0], None
+
+
+async def bridge_submit(
+    results: int, threads: int
+) -> Tuple[float, int, Optional[int]]:
+    wakeups = count_wakeups(asyncio.get_running_loop())
+    bridge = FutureBridge()
+    with ThreadPoolExecutor(threads) as executor:
+        start = perf_counter()
+        await asyncio.gather(
+            *[
+                bridge.submit(executor, square, number)
+                for number in range(results)
+            ]
+        )
+        return perf_counter() - start, wakeups[0], bridge.batches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--results", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'':<24} {'completions/sec':>16} {'wakeups':>9} {'batches':>9}")
+    for name, run in {
+        "call_soon_threadsafe": per_result,
+        "bridge": bridged,
+        "run_in_executor": run_in_executor,
+        "bridge.submit": bridge_submit,
+    }.items():
+        seconds, wakeups, batches = asyncio.run(run(args.results, args.threads))
+        print(
+            f"{name:<24} {args.results / seconds:>16.0f} {wakeups:>9}"
+            f" {'-' if batches is None else batches:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
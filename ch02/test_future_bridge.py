@@ -0,0 +1,100 @@
+"""
+`future_bridge.FutureBridge` under threads that keep completing futures:
+the loop still runs its other callbacks between the batches.
+
+    python -m pytest ch02/test_future_bridge.py
+"""
+import asyncio
+import gc
+import threading
+from time import perf_counter
+from typing import List
+
+from ch02.future_bridge import Completion, FutureBridge
+
+
+async def heartbeat(interval: float, lags: List[float]) -> None:
+    while True:
+        start = perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(perf_counter() - start - interval)
+
+
+def test_heartbeat_runs_during_a_sustained_producer_run():
+    async def main():
+        bridge = FutureBridge()
+        futures, completions = zip(
+            *[bridge.create_future() for _ in range(300_000)]
+        )
+
+        def complete(completions: List[Completion]) -> None:
+            for number, completion in enumerate(completions):
+                completion.set_result(number)
+
+        # `gather` sets up its 300k callbacks right away, before the beat
+        done = asyncio.gather(*futures)
+        # a full collection over the 600k objects we just made blocks for
+        # about a second, that's not what we are measuring
+        gc.freeze()
+        lags: List[float] = []
+        beat = asyncio.create_task(heartbeat(0.01, lags))
+        await asyncio.sleep(0)
+        threads = [
+            threading.Thread(target=complete, args=(completions[i::4],))
+            for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        await done
+        beat.cancel()
+        for thread in threads:
+            thread.join()
+        gc.unfreeze()
+
+        # the whole run in one batch blocked the loop for seconds, a batch
+        # of `max_batch` takes milliseconds (tens while the loop gets its
+        # share of the GIL with the 4 threads)
+        assert len(lags) > 10
+        assert max(lags) < 0.5, f"heartbeat lag {max(lags):.3f}s"
+        assert bridge.completions == len(futures)
+        assert bridge.batches >= len(futures) / bridge.max_batch
+
+    asyncio.run(main())
+
+
+def test_a_bad_completion_does_not_block_the_batch():
+    async def main():
+        bridge = FutureBridge()
+        bad, bad_completion = bridge.create_future()
+        good, good_completion = bridge.create_future()
+
+        def complete() -> None:
+            bad_completion.set_exception(StopIteration())
+            good_completion.set_result(2)
+
+        asyncio.get_running_loop().set_exception_handler(lambda *_: None)
+        threading.Thread(target=complete).start()
+        assert await asyncio.wait_for(good, 2) == 2
+        assert not bad.done()
+
+    asyncio.run(main())
+
+
+def test_cancellation_both_ways():
+    async def main():
+        bridge = FutureBridge()
+        future, completion = bridge.create_future()
+        threading.Thread(target=completion.cancel).start()
+        try:
+            await asyncio.wait_for(future, 2)
+        except asyncio.CancelledError:
+            pass
+        assert future.cancelled()
+
+        future, completion = bridge.create_future()
+        future.cancel()
+        # the done callbacks run on the next iteration of the loop
+        await asyncio.sleep(0)
+        assert completion.cancelled()
+
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+The event loop's timer heap against `timer_wheel.TimerWheel`
+with `timers` pending timers, delays spread over 1 to 60 seconds
+like idle and request timeouts:
+- schedule: `call_later` for every timer
+- re-arm: cancel and schedule again, what an idle timeout does
+  on every message
+- cancel: cancel every timer, then one loop iteration, that's when
+  the loop drops the cancelled handles from its heap
+- loop: the cost of one loop iteration while the timers are pending
+
+    python -m ch02.timer_wheel_benchmark --timers 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import gc
+import random
+from time import perf_counter_ns
+from typing import Callable, Dict, List
+
+from timer_wheel import TimerWheel
+
+
+def noop() -> None:
+    pass
+
+
+async def measure(call_later: Callable, timers: int) -> Dict[str, float]:
+    delays: List[float] = [random.uniform(1, 60) for _ in range(timers)]
+    results = {}
+
+    start = perf_counter_ns()
+    handles = [call_later(delay, noop) for delay in delays]
+    results["schedule"] = (perf_counter_ns() - start) / timers
+
+    start = perf_counter_ns()
+    for index, delay in enumerate(delays):
+        handles[index].cancel()
+        handles[index] = call_later(delay, noop)
+    results["re-arm"] = (perf_counter_ns() - start) / timers
+
+    iterations = 10_000
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        await asyncio.sleep(0)
+    results["loop"] = (perf_counter_ns() - start) / iterations
+
+    start = perf_counter_ns()
+    for handle in handles:
+        handle.cancel()
+    await asyncio.sleep(0)
+    results["cancel"] = (perf_counter_ns() - start) / timers
+    return results
+
+
+async def heap(timers: int) -> Dict[str, float]:
+    return await measure(asyncio.get_running_loop().call_later, timers)
+
+
+async def wheel(timers: int) -> Dict[str, float]:
+    return await measure(TimerWheel().call_later, timers)
+
+
+async def empty_loop() -> float:
+    iterations = 10_000
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        await asyncio.sleep(0)
+    return (perf_counter_ns() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--timers", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    args = parser.parse_args()
+
+    print(f"empty loop: {asyncio.run(empty_loop()):.0f} ns/iteration")
+    print(
+        f"{'timers':>9} {'':<6} {'schedule ns':>12} {'re-arm ns':>10}"
+        f" {'cancel ns':>10} {'loop ns':>8}"
+    )
+    for timers in args.timers:
+        for name, run in {"heap": heap, "wheel": wheel}.items():
+            result = asyncio.run(run(timers))
+            gc.collect()
+            print(
+                f"{timers:>9} {name:<6} {result['schedule']:>12.0f}"
+                f" {result['re-arm']:>10.0f} {result['cancel']:>10.0f}"
+                f" {result['loop']:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,13 @@ for each client request will establish a new
 
 import socket
 
+from ch03 import workers
+from ch03.line_framer import FrameTooLargeError, LineFramer
 
-def create_web_server_socket(address: tuple = ("127.0.0.1", 8000)):
+
+def create_web_server_socket(
+    address: tuple = ("127.0.0.1", 8000), reuse_port: bool = False
+):
     # SOCK_STREAM -> TCP
     # AF_INET -> hostname port
     server_socket = socket.socket(
@@ -16,12 +21,15 @@ def create_web_server_socket(address: tuple = ("127.0.0.1", 8000)):
     )
     # Allow us to reuse the port number after we stop and restart the application
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        # Allow the other workers to bind the same address
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
     # Set the address
     server_socket.bind(address)
     # Open the socket
     print(f"Listening at: {address}")
     server_socket.listen()
-    connections = []
+    connections = {}
     # Serve
     try:
         while True:
@@ -30,26 +38,30 @@ def create_web_server_socket(address: tuple = ("127.0.0.1", 8000)):
             # as a result, all the clients will have to wait
             connection, client_address = server_socket.accept()
             print(f"Got a connection from: {client_address}")
-            connections.append(connection)
-            for client_conn in connections:
+            # each connection reads into its own buffer
+            connections[connection] = LineFramer()
+            for client_conn, framer in list(connections.items()):
                 print(f"Total connections are: {len(connections)}")
-                # create a small buffer
-                buffer = b""
-                while buffer[-2:] != b"\r\n":
-                    # read 2 bytes
-                    data = client_conn.recv(2)
-                    print(f"I got data: {data}")
-                    if not data:
-                        break
-                    else:
-                        buffer += data
-
-                print(f"Client says: {buffer}")
-                client_conn.send(b">>Server says: " + buffer)
+                try:
+                    while (frame := framer.next_frame()) is None:
+                        received = framer.recv_into(client_conn)
+                        print(f"I got #{received} byte(s)")
+                        if not received:
+                            break
+                except FrameTooLargeError as ex:
+                    print(f"Dropping the client: {ex}")
+                    frame = None
+                if frame is None:
+                    del connections[client_conn]
+                    client_conn.close()
+                    continue
+
+                print(f"Client says: {frame.tobytes()}")
+                client_conn.sendmsg([b">>Server says: ", frame])
     finally:
         print("Closing the web-socket")
         server_socket.close()
 
 
 if __name__ == "__main__":
-    create_web_server_socket()
+    workers.main(create_web_server_socket)
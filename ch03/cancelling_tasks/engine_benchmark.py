@@ -0,0 +1,150 @@
+"""
+Compare the `sock_recv` echo server of `gracefull_shutdown.py`
+with the `BufferedProtocol` echo server of `protocol_server.py`.
+
+Each server runs in its own process while the clients run here.
+We open all the client connections first and then every client sends
+`requests` messages, waiting for the echo before sending the next one.
+
+    python -m ch03.cancelling_tasks.engine_benchmark 1000 10000
+"""
+import asyncio
+import multiprocessing
+import os
+import resource
+import socket
+import sys
+from time import perf_counter, perf_counter_ns
+from typing import Callable, Dict, List, Tuple
+
+from ch03.cancelling_tasks.gracefull_shutdown import connection_listener
+from ch03.cancelling_tasks.protocol_server import serve
+
+MESSAGE = b"ping\r\n"
+
+
+async def sock_recv_engine(server_socket: socket.socket) -> None:
+    await connection_listener(server_socket, asyncio.get_running_loop())
+
+
+ENGINES: Dict[str, Callable] = {
+    "sock_recv": sock_recv_engine,
+    "protocol": serve,
+}
+
+
+def run_server(engine: str, server_socket: socket.socket) -> None:
+    # don't let the per-connection prints dominate the measurement
+    sys.stdout = open(os.devnull, "w")
+    asyncio.run(ENGINES[engine](server_socket))
+
+
+def raise_open_files_limit(connections: int) -> None:
+    """
+    Each connection needs a file descriptor on both sides
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = 2 * connections + 100
+    if soft < wanted:
+        limit = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+
+
+def percentile(sorted_values: List[int], percent: float) -> int:
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+async def open_connections(
+    address: Tuple[str, int], connections: int
+) -> List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]:
+    # don't overflow the listen backlog with thousands of SYNs at once
+    semaphore = asyncio.Semaphore(100)
+
+    async def connect():
+        async with semaphore:
+            return await asyncio.open_connection(*address)
+
+    return await asyncio.gather(*[connect() for _ in range(connections)])
+
+
+async def client(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    requests: int,
+    latencies: List[int],
+) -> None:
+    for _ in range(requests):
+        start = perf_counter_ns()
+        writer.write(MESSAGE)
+        await reader.readexactly(len(MESSAGE))
+        latencies.append(perf_counter_ns() - start)
+
+
+async def run_clients(
+    address: Tuple[str, int], connections: int, requests: int
+) -> Tuple[float, List[int]]:
+    streams = await open_connections(address, connections)
+    latencies: List[int] = []
+    start = perf_counter()
+    await asyncio.gather(
+        *[
+            client(reader, writer, requests, latencies)
+            for reader, writer in streams
+        ]
+    )
+    total = perf_counter() - start
+    for _, writer in streams:
+        writer.close()
+    return total, latencies
+
+
+def benchmark(engine: str, connections: int, requests: int) -> Dict:
+    server_socket = socket.socket()
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server_socket.bind(("127.0.0.1", 0))
+    server_socket.listen(4096)
+    server_socket.setblocking(False)
+    address = server_socket.getsockname()
+
+    server = multiprocessing.Process(
+        target=run_server, args=(engine, server_socket), daemon=True
+    )
+    server.start()
+    server_socket.close()
+    try:
+        total, latencies = asyncio.run(
+            run_clients(address, connections, requests)
+        )
+    finally:
+        server.terminate()
+        server.join()
+
+    latencies.sort()
+    return {
+        "engine": engine,
+        "connections": connections,
+        "requests/sec": len(latencies) / total,
+        "p50 ms": percentile(latencies, 50) / 1_000_000,
+        "p99 ms": percentile(latencies, 99) / 1_000_000,
+    }
+
+
+def main(concurrency: List[int], requests: int = 20) -> None:
+    raise_open_files_limit(max(concurrency))
+    print(
+        f"{'engine':<10} {'connections':>11} {'requests/sec':>13}"
+        f" {'p50 ms':>8} {'p99 ms':>8}"
+    )
+    for connections in concurrency:
+        for engine in ENGINES:
+            result = benchmark(engine, connections, requests)
+            print(
+                f"{result['engine']:<10} {result['connections']:>11}"
+                f" {result['requests/sec']:>13.0f}"
+                f" {result['p50 ms']:>8.2f} {result['p99 ms']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000])
@@ -1,9 +1,16 @@
+"""
+An echo server with a graceful shutdown:
+on SIGINT / SIGTERM we stop accepting connections, give all the open
+connections one `drain_timeout` to finish together and cancel the rest.
+"""
 import asyncio
 import logging
 import signal
 import socket
 from asyncio import AbstractEventLoop
-from typing import List
+from typing import Optional, Set, Tuple
+
+from ch03 import workers
 
 
 async def echo(connection: socket, loop: AbstractEventLoop) -> None:
@@ -19,7 +26,8 @@ async def echo(connection: socket, loop: AbstractEventLoop) -> None:
         connection.close()
 
 
-echo_tasks = []
+# a task leaves the set when it's done, so it only holds the live connections
+echo_tasks: Set[asyncio.Task] = set()
 
 
 async def connection_listener(server_socket, loop):
@@ -28,7 +36,8 @@ async def connection_listener(server_socket, loop):
         connection.setblocking(False)
         print(f"Got a connection from {address}")
         echo_task = asyncio.create_task(echo(connection, loop))
-        echo_tasks.append(echo_task)
+        echo_tasks.add(echo_task)
+        echo_task.add_done_callback(echo_tasks.discard)
 
 
 class GracefulExit(SystemExit):
@@ -39,35 +48,75 @@ def shutdown():
     raise GracefulExit()
 
 
-async def close_echo_tasks(echo_tasks: List[asyncio.Task]):
-    waiters = [asyncio.wait_for(task, 2) for task in echo_tasks]
-    for task in waiters:
-        try:
-            await task
-        except asyncio.exceptions.TimeoutError:
-            # We expect a timeout error here
-            pass
-
-
-async def main():
+async def close_echo_tasks(
+    echo_tasks: Set[asyncio.Task], timeout: float = 2
+) -> Tuple[int, int]:
+    """
+    Wait for all the tasks at once for up to `timeout` seconds,
+    then cancel the ones still running.
+    Returns how many tasks finished in time and how many we cancelled
+    """
+    tasks = set(echo_tasks)
+    if not tasks:
+        return 0, 0
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    return len(done), len(pending)
+
+
+async def stop(listener: asyncio.Task, timeout: float = 2) -> Tuple[int, int]:
+    """
+    Stop accepting connections, then drain the open ones
+    """
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+    drained, cancelled = await close_echo_tasks(echo_tasks, timeout)
+    print(f"Drained {drained} connection(s), cancelled {cancelled}")
+    return drained, cancelled
+
+
+async def main(
+    server_address: tuple = ("127.0.0.1", 8000), reuse_port: bool = False
+):
     server_socket = socket.socket()
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
 
-    server_address = ("127.0.0.1", 8000)
     server_socket.setblocking(False)
     server_socket.bind(server_address)
     server_socket.listen()
 
+    loop = asyncio.get_running_loop()
     for signame in {"SIGINT", "SIGTERM"}:
         loop.add_signal_handler(getattr(signal, signame), shutdown)
-    await connection_listener(server_socket, loop)
+    try:
+        await connection_listener(server_socket, loop)
+    finally:
+        server_socket.close()
 
 
-loop = asyncio.new_event_loop()
+def run(
+    address: tuple = ("127.0.0.1", 8000),
+    reuse_port: bool = False,
+    drain_timeout: float = 2,
+) -> Optional[Tuple[int, int]]:
+    """
+    Serve until SIGINT / SIGTERM, returns how many connections drained
+    and how many were cancelled
+    """
+    loop = asyncio.new_event_loop()
+    listener = loop.create_task(main(address, reuse_port))
+
+    try:
+        loop.run_until_complete(listener)
+    except GracefulExit:
+        return loop.run_until_complete(stop(listener, drain_timeout))
+    finally:
+        loop.close()
+
 
-try:
-    loop.run_until_complete(main())
-except GracefulExit:
-    loop.run_until_complete(close_echo_tasks(echo_tasks))
-finally:
-    loop.close()
+if __name__ == "__main__":
+    workers.main(run)
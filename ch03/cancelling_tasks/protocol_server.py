@@ -0,0 +1,120 @@
+"""
+The same echo server as `gracefull_shutdown.py` but built on
+`asyncio.BufferedProtocol` instead of `loop.sock_recv`/`loop.sock_sendall`.
+
+With `sock_recv` every read creates a new future, registers the socket with the
+selector and allocates a new `bytes` object for the data.
+A protocol stays registered for the whole connection, and with a
+`BufferedProtocol` the event loop reads straight into a `bytearray`
+that we allocate once per connection and reuse for every read.
+"""
+import asyncio
+import logging
+import signal
+import socket
+from asyncio import BufferedProtocol, Transport
+from typing import Optional, Set
+
+from ch03 import workers
+
+BUFFER_SIZE = 1024
+
+
+class EchoProtocol(BufferedProtocol):
+    """
+    Echo back whatever the client sends, a `boom\\r\\n` message
+    closes the connection with an error.
+    """
+
+    def __init__(
+        self, connections: Set["EchoProtocol"], buffer_size: int = BUFFER_SIZE
+    ):
+        self.connections = connections
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.transport: Optional[Transport] = None
+
+    def connection_made(self, transport: Transport) -> None:
+        print(f"Got a connection from {transport.get_extra_info('peername')}")
+        self.transport = transport
+        self.connections.add(self)
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        # the loop will `recv_into` this buffer
+        return self.view
+
+    def buffer_updated(self, nbytes: int) -> None:
+        data = self.view[:nbytes]
+        if data == b"boom\r\n":
+            logging.error("Unexpected network error")
+            self.transport.close()
+            return
+        # `write` either sends the data right away or copies
+        # what is left, so the buffer can be reused for the next read
+        self.transport.write(data)
+
+    def pause_writing(self) -> None:
+        # the client doesn't read fast enough, stop reading from it
+        # until the transport's write buffer is drained
+        self.transport.pause_reading()
+
+    def resume_writing(self) -> None:
+        self.transport.resume_reading()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if exc is not None:
+            logging.error("Connection lost", exc_info=exc)
+        self.connections.discard(self)
+
+
+def close_connections(connections: Set[EchoProtocol]) -> None:
+    """
+    Close every open connection,
+    the transports flush any pending data before closing the socket
+    """
+    print(f"Closing #{len(connections)} connection(s)")
+    for connection in list(connections):
+        connection.transport.close()
+
+
+async def serve(server_socket: socket.socket) -> None:
+    """
+    Serve the clients of an already bound and listening `server_socket`
+    until we get a `SIGINT` or a `SIGTERM`
+    """
+    loop = asyncio.get_running_loop()
+    connections: Set[EchoProtocol] = set()
+    stop = asyncio.Event()
+    for signame in {"SIGINT", "SIGTERM"}:
+        loop.add_signal_handler(getattr(signal, signame), stop.set)
+
+    server = await loop.create_server(
+        lambda: EchoProtocol(connections), sock=server_socket
+    )
+    await stop.wait()
+    # stop accepting new connections first
+    server.close()
+    close_connections(connections)
+    await server.wait_closed()
+
+
+async def main(
+    server_address: tuple = ("127.0.0.1", 8000), reuse_port: bool = False
+):
+    server_socket = socket.socket()
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+    server_socket.setblocking(False)
+    server_socket.bind(server_address)
+    server_socket.listen()
+    await serve(server_socket)
+
+
+def run(address: tuple = ("127.0.0.1", 8000), reuse_port: bool = False):
+    asyncio.run(main(address, reuse_port))
+
+
+if __name__ == "__main__":
+    workers.main(run)
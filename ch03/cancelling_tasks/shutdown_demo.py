@@ -0,0 +1,160 @@
+"""
+Shut down `gracefull_shutdown.py` with thousands of open connections
+and check that it takes about `drain_timeout`, not `drain_timeout` per
+connection.
+
+Half of the clients keep sending messages for `busy` seconds after the
+SIGTERM and then close their connection, so they drain.
+The other half stay idle and get cancelled at the deadline.
+
+It exits with an error if the shutdown takes longer than `drain_timeout`
+plus `margin` seconds, if the server didn't drain or cancel every
+connection, or if it left an idle connection open.
+
+    python -m ch03.cancelling_tasks.shutdown_demo --connections 5000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from time import perf_counter
+from typing import List, Tuple
+
+from ch03.cancelling_tasks import gracefull_shutdown
+from ch03.cancelling_tasks.engine_benchmark import (
+    MESSAGE,
+    open_connections,
+    raise_open_files_limit,
+)
+
+ADDRESS = ("127.0.0.1", 8004)
+
+
+def run_server(
+    address: Tuple[str, int],
+    drain_timeout: float,
+    counts: multiprocessing.Queue,
+) -> None:
+    # don't print a line per connection
+    sys.stdout = open(os.devnull, "w")
+    counts.put(gracefull_shutdown.run(address, drain_timeout=drain_timeout))
+
+
+def wait_for_server(address: Tuple[str, int]) -> None:
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(address).close()
+            return
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+async def busy_client(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, busy: float
+) -> None:
+    deadline = asyncio.get_running_loop().time() + busy
+    while asyncio.get_running_loop().time() < deadline:
+        writer.write(MESSAGE)
+        await reader.readexactly(len(MESSAGE))
+        await asyncio.sleep(0.1)
+    writer.close()
+
+
+async def idle_client(reader: asyncio.StreamReader) -> bool:
+    """
+    True if the server closed the connection
+    """
+    return await reader.read() == b""
+
+
+async def shutdown(
+    server: multiprocessing.Process, connections: int, busy: float
+) -> Tuple[float, int, int]:
+    """
+    Returns how long the shutdown took, how many idle connections there were
+    and how many of them the server closed
+    """
+    streams = await open_connections(ADDRESS, connections)
+    print(f"Opened {len(streams)} connections, sending SIGTERM")
+    busy_streams = streams[: connections // 2]
+    idle_streams = streams[connections // 2 :]
+
+    start = perf_counter()
+    os.kill(server.pid, signal.SIGTERM)
+    clients = [
+        asyncio.create_task(busy_client(reader, writer, busy))
+        for reader, writer in busy_streams
+    ]
+    idle = [
+        asyncio.create_task(idle_client(reader)) for reader, _ in idle_streams
+    ]
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, server.join)
+    seconds = perf_counter() - start
+
+    await asyncio.gather(*clients, return_exceptions=True)
+    closed = sum(
+        result is True
+        for result in await asyncio.gather(*idle, return_exceptions=True)
+    )
+    for _, writer in idle_streams:
+        writer.close()
+    return seconds, len(idle_streams), closed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--drain-timeout", type=float, default=2)
+    parser.add_argument("--busy", type=float, default=1)
+    # closing the listener and the event loop after the deadline
+    parser.add_argument("--margin", type=float, default=1)
+    args = parser.parse_args()
+
+    raise_open_files_limit(args.connections)
+    counts = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=run_server, args=(ADDRESS, args.drain_timeout, counts)
+    )
+    server.start()
+    try:
+        wait_for_server(ADDRESS)
+        seconds, idle, closed = asyncio.run(
+            shutdown(server, args.connections, args.busy)
+        )
+    finally:
+        server.terminate()
+    drained, cancelled = counts.get(timeout=5)
+    print(
+        f"Shutdown took {seconds:.2f}s (deadline {args.drain_timeout}s),"
+        f" drained {drained} connection(s), cancelled {cancelled},"
+        f" {closed}/{idle} idle connections were closed by the server"
+    )
+
+    failures: List[str] = []
+    if seconds > args.drain_timeout + args.margin:
+        failures.append(
+            f"shutdown took {seconds:.2f}s, more than"
+            f" {args.drain_timeout}s + {args.margin}s"
+        )
+    if drained + cancelled != args.connections:
+        failures.append(
+            f"drained {drained} + cancelled {cancelled}"
+            f" != {args.connections} connections"
+        )
+    if closed != idle:
+        failures.append(f"{idle - closed} idle connection(s) left open")
+    if failures:
+        sys.exit("FAILED: " + "; ".join(failures))
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Split the bytes we read from a socket into `\\r\\n` terminated frames.
+
+Instead of `recv(2)` and `buffer += data`, which copies the whole
+buffer for every two bytes we read, we `recv_into` a `bytearray` that is
+allocated once, and hand out `memoryview` slices of it.
+A frame is only valid until the next `recv_into`,
+since the unread bytes are moved to the front of the buffer to make room.
+"""
+import socket
+from typing import Iterator, Optional
+
+DELIMITER = b"\r\n"
+
+
+class FrameTooLargeError(Exception):
+    pass
+
+
+class LineFramer:
+    def __init__(self, max_frame_size: int = 4096):
+        self.buffer = bytearray(max_frame_size)
+        self.view = memoryview(self.buffer)
+        # the unread bytes are `buffer[start:end]`
+        self.start = 0
+        self.end = 0
+
+    def compact(self) -> None:
+        """
+        Move the unread bytes to the front of the buffer
+        """
+        size = self.end - self.start
+        self.view[:size] = self.view[self.start : self.end]
+        self.start, self.end = 0, size
+
+    def recv_into(self, sock: socket.socket) -> int:
+        """
+        Read from `sock` into the free part of the buffer,
+        returns the bytes read, `0` means that the client closed the connection
+        """
+        if self.start == self.end:
+            self.start = self.end = 0
+        elif self.end == len(self.buffer):
+            if self.start == 0:
+                raise FrameTooLargeError(
+                    f"No {DELIMITER!r} in {len(self.buffer)} bytes"
+                )
+            self.compact()
+        received = sock.recv_into(self.view[self.end :])
+        self.end += received
+        return received
+
+    def next_frame(self) -> Optional[memoryview]:
+        """
+        The next complete frame, delimiter included, or `None`
+        """
+        index = self.buffer.find(DELIMITER, self.start, self.end)
+        if index == -1:
+            return None
+        frame = self.view[self.start : index + len(DELIMITER)]
+        self.start = index + len(DELIMITER)
+        return frame
+
+    def frames(self) -> Iterator[memoryview]:
+        """
+        All the complete frames we have read so far
+        """
+        return iter(self.next_frame, None)
@@ -0,0 +1,104 @@
+"""
+Syscalls and bytes copied per message when we read `\\r\\n` terminated lines
+with `recv(2)` and `buffer += data`, as the first servers did,
+and with the `LineFramer`.
+
+    python -m ch03.line_framer_benchmark
+"""
+import socket
+import threading
+from time import perf_counter
+from typing import Dict
+
+from ch03.line_framer import LineFramer
+
+
+class CountingSocket:
+    """
+    Count the `recv` and `recv_into` calls of a socket
+    """
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.syscalls = 0
+
+    def recv(self, size: int) -> bytes:
+        self.syscalls += 1
+        return self.sock.recv(size)
+
+    def recv_into(self, buffer) -> int:
+        self.syscalls += 1
+        return self.sock.recv_into(buffer)
+
+
+class CountingLineFramer(LineFramer):
+    copied = 0
+
+    def compact(self) -> None:
+        self.copied += self.end - self.start
+        super().compact()
+
+
+def read_with_recv(sock: CountingSocket, messages: int) -> int:
+    """
+    Returns the bytes copied while growing the buffers
+    """
+    copied = 0
+    for _ in range(messages):
+        buffer = b""
+        while buffer[-2:] != b"\r\n":
+            data = sock.recv(2)
+            # `buffer + data` creates a new bytes object
+            copied += len(buffer) + len(data)
+            buffer += data
+    return copied
+
+
+def read_with_framer(sock: CountingSocket, messages: int) -> int:
+    framer = CountingLineFramer()
+    received = 0
+    while received < messages:
+        framer.recv_into(sock)
+        received += sum(1 for _ in framer.frames())
+    return framer.copied
+
+
+def benchmark(reader, messages: int, message: bytes) -> Dict:
+    server, client = socket.socketpair()
+    sender = threading.Thread(target=client.sendall, args=(message * messages,))
+    sender.start()
+    counting_socket = CountingSocket(server)
+    start = perf_counter()
+    copied = reader(counting_socket, messages)
+    total = perf_counter() - start
+    sender.join()
+    server.close()
+    client.close()
+    return {
+        "syscalls/msg": counting_socket.syscalls / messages,
+        "copied/msg": copied / messages,
+        "us/msg": total / messages * 1_000_000,
+    }
+
+
+def main(messages: int = 20_000) -> None:
+    print(
+        f"{'reader':<10} {'msg bytes':>9} {'syscalls/msg':>13}"
+        f" {'copied/msg':>11} {'us/msg':>8}"
+    )
+    # `recv(2)` only finds the delimiter on an even length message
+    for size in (30, 250, 1000):
+        message = b"x" * (size - 2) + b"\r\n"
+        for name, reader in {
+            "recv(2)": read_with_recv,
+            "framer": read_with_framer,
+        }.items():
+            result = benchmark(reader, messages, message)
+            print(
+                f"{name:<10} {size:>9} {result['syscalls/msg']:>13.2f}"
+                f" {result['copied/msg']:>11.0f} {result['us/msg']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
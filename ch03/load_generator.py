@@ -0,0 +1,161 @@
+"""
+A load generator for the `ch03` servers, instead of testing them by hand
+with telnet.
+
+We open `connections` connections and every connection sends a
+`\\r\\n` terminated message and waits for the echo before sending the next one,
+as fast as it can or, with `--rate`, at `rate / connections` messages/sec.
+With a fixed rate, latency counts from when the message should have been
+sent, so a server that stalls us isn't rewarded with fewer samples.
+
+Every echo must be the message with one of the prefixes of our servers,
+`>>Server says: ` (blocking and cpu bound) or `server says:` (selector).
+The result of a run is a JSON line, printed and appended to `--output`,
+so we can compare the servers on the same workload:
+
+    python -m ch03.non_blocking_server_with_notifications.demo
+    python -m ch03.load_generator --label selector --output results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import time
+from time import perf_counter_ns
+from typing import Dict, List, Optional, Tuple
+
+from ch03.cancelling_tasks.engine_benchmark import (
+    open_connections,
+    percentile,
+    raise_open_files_limit,
+)
+
+PREFIXES = (b">>Server says: ", b"server says:")
+
+
+class Results:
+    def __init__(self):
+        self.latencies: List[int] = []
+        self.mismatched = 0
+        self.errors: Dict[str, int] = {}
+
+    def error(self, ex: BaseException) -> None:
+        name = type(ex).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def is_echo(response: bytes, message: bytes) -> bool:
+    return any(response == prefix + message for prefix in PREFIXES)
+
+
+async def client(
+    number: int,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    deadline: float,
+    interval: Optional[float],
+    timeout: float,
+    results: Results,
+) -> None:
+    loop = asyncio.get_running_loop()
+    # spread the first messages of the connections over one interval
+    next_send = loop.time() + (
+        interval * (number % 100) / 100 if interval else 0
+    )
+    sequence = 0
+    try:
+        while next_send < deadline:
+            if interval:
+                await asyncio.sleep(next_send - loop.time())
+                start = perf_counter_ns() - int(
+                    max(loop.time() - next_send, 0) * 1e9
+                )
+            else:
+                start = perf_counter_ns()
+            message = f"message {number} {sequence}\r\n".encode()
+            writer.write(message)
+            response = await asyncio.wait_for(
+                reader.readuntil(b"\r\n"), timeout
+            )
+            results.latencies.append(perf_counter_ns() - start)
+            if not is_echo(response, message):
+                results.mismatched += 1
+            sequence += 1
+            next_send = next_send + interval if interval else loop.time()
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError) as ex:
+        results.error(ex)
+    finally:
+        writer.close()
+
+
+async def run(
+    address: Tuple[str, int],
+    connections: int,
+    duration: float,
+    rate: Optional[float] = None,
+    timeout: float = 5,
+) -> Dict:
+    streams = await open_connections(address, connections)
+    results = Results()
+    interval = connections / rate if rate else None
+    start = time.monotonic()
+    deadline = asyncio.get_running_loop().time() + duration
+    await asyncio.gather(
+        *[
+            client(number, reader, writer, deadline, interval, timeout, results)
+            for number, (reader, writer) in enumerate(streams)
+        ]
+    )
+    elapsed = time.monotonic() - start
+    latencies = sorted(results.latencies) or [0]
+    return {
+        "address": f"{address[0]}:{address[1]}",
+        "connections": connections,
+        "rate": rate,
+        "duration_sec": elapsed,
+        "responses": len(results.latencies),
+        "mismatched": results.mismatched,
+        "errors": results.errors,
+        "requests_per_sec": len(results.latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) / 1_000_000,
+        "p90_ms": percentile(latencies, 90) / 1_000_000,
+        "p99_ms": percentile(latencies, 99) / 1_000_000,
+        "max_ms": latencies[-1] / 1_000_000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument(
+        "--rate", type=float, help="messages/sec over all the connections"
+    )
+    parser.add_argument("--timeout", type=float, default=5)
+    parser.add_argument("--label", default="", help="added to the result")
+    parser.add_argument("--output", help="append the result to this file")
+    args = parser.parse_args()
+
+    raise_open_files_limit(args.connections)
+    result = {
+        "label": args.label,
+        **asyncio.run(
+            run(
+                (args.host, args.port),
+                args.connections,
+                args.duration,
+                args.rate,
+                args.timeout,
+            )
+        ),
+    }
+    line = json.dumps(result)
+    print(line)
+    if args.output:
+        with open(args.output, "a") as output:
+            output.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
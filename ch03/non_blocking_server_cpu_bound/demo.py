@@ -6,6 +6,8 @@ for each client request will establish a new
 
 import socket
 
+from ch03.line_framer import FrameTooLargeError, LineFramer
+
 
 def create_web_server_socket(address: tuple = ("127.0.0.1", 8000)):
     # SOCK_STREAM -> TCP
@@ -21,7 +23,7 @@ def create_web_server_socket(address: tuple = ("127.0.0.1", 8000)):
     # Open the socket
     print(f"Listening at: {address}")
     server_socket.listen()
-    connections = []
+    connections = {}
     # Serve
     try:
         while True:
@@ -30,26 +32,28 @@ def create_web_server_socket(address: tuple = ("127.0.0.1", 8000)):
                 connection, client_address = server_socket.accept()
                 connection.setblocking(False)
                 print(f"Got a connection from: {client_address}")
-                connections.append(connection)
+                # each connection reads into its own buffer, so a line
+                # can arrive over several iterations of the loop
+                connections[connection] = LineFramer()
             except BlockingIOError:
                 print("No connection yet!")
-            for client_conn in connections:
+            for client_conn, framer in list(connections.items()):
                 try:
-                    # create a small buffer
-                    buffer = b""
-                    while buffer[-2:] != b"\r\n":
-                        # read 2 bytes
-                        data = client_conn.recv(2)
-                        print(f"I got data: {data}")
-                        if not data:
-                            break
-                        else:
-                            buffer += data
-
-                    print(f"Client says: {buffer}")
-                    client_conn.send(b">>Server says: " + buffer)
+                    received = framer.recv_into(client_conn)
+                    print(f"I got #{received} byte(s)")
+                    if not received:
+                        del connections[client_conn]
+                        client_conn.close()
+                        continue
+                    for frame in framer.frames():
+                        print(f"Client says: {frame.tobytes()}")
+                        client_conn.sendmsg([b">>Server says: ", frame])
                 except BlockingIOError:
                     pass
+                except FrameTooLargeError as ex:
+                    print(f"Dropping the client: {ex}")
+                    del connections[client_conn]
+                    client_conn.close()
     finally:
         print("Closing the web-socket")
         server_socket.close()
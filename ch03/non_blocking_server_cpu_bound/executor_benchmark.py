@@ -0,0 +1,129 @@
+"""
+How responsive `executor_server.py` stays for light clients while
+heavy clients keep it busy with `fib` messages, for every executor.
+
+The light clients send a `ping` every `interval` seconds and measure how long
+the echo takes, the heavy clients send `fib <number>` messages back to back.
+
+    python -m ch03.non_blocking_server_cpu_bound.executor_benchmark
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from time import perf_counter_ns
+from typing import Dict, List
+
+from ch03.cancelling_tasks.engine_benchmark import percentile
+from ch03.non_blocking_server_cpu_bound.executor_server import EXECUTORS, serve
+
+ADDRESS = ("127.0.0.1", 8005)
+
+
+def run_server(executor: str, max_pending: int) -> None:
+    sys.stdout = open(os.devnull, "w")
+    asyncio.run(serve(ADDRESS, executor, max_pending=max_pending))
+
+
+async def connect() -> tuple:
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            return await asyncio.open_connection(*ADDRESS)
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def light_client(
+    duration: float, interval: float, latencies: List[int]
+) -> None:
+    reader, writer = await connect()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = perf_counter_ns()
+        writer.write(b"ping\r\n")
+        await reader.readline()
+        latencies.append(perf_counter_ns() - start)
+        await asyncio.sleep(interval)
+    writer.close()
+
+
+async def heavy_client(
+    duration: float, number: int, replies: Dict[str, int]
+) -> None:
+    reader, writer = await connect()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        writer.write(f"fib {number}\r\n".encode())
+        response = await reader.readline()
+        if response.strip().endswith(b"busy"):
+            replies["busy"] += 1
+            # don't spin on a busy server
+            await asyncio.sleep(0.01)
+        else:
+            replies["done"] += 1
+    writer.close()
+
+
+async def run_clients(args: argparse.Namespace) -> Dict:
+    latencies: List[int] = []
+    replies = {"done": 0, "busy": 0}
+    await asyncio.gather(
+        *[
+            light_client(args.duration, args.interval, latencies)
+            for _ in range(args.light)
+        ],
+        *[
+            heavy_client(args.duration, args.number, replies)
+            for _ in range(args.heavy)
+        ],
+    )
+    latencies.sort()
+    return {
+        "p50 ms": percentile(latencies, 50) / 1_000_000,
+        "p99 ms": percentile(latencies, 99) / 1_000_000,
+        "max ms": latencies[-1] / 1_000_000,
+        **replies,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--light", type=int, default=10)
+    parser.add_argument("--heavy", type=int, default=8)
+    parser.add_argument("--number", type=int, default=25)
+    parser.add_argument("--duration", type=float, default=3)
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--max-pending", type=int, default=4)
+    args = parser.parse_args()
+
+    print(
+        f"{args.light} light clients, {args.heavy} heavy clients sending"
+        f" `fib {args.number}`, {os.cpu_count()} CPU(s)"
+    )
+    print(
+        f"{'executor':<8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        f" {'fib done':>9} {'busy':>6}"
+    )
+    for executor in EXECUTORS:
+        server = multiprocessing.Process(
+            target=run_server, args=(executor, args.max_pending)
+        )
+        server.start()
+        try:
+            result = asyncio.run(run_clients(args))
+        finally:
+            server.terminate()
+            server.join()
+        print(
+            f"{executor:<8} {result['p50 ms']:>8.2f} {result['p99 ms']:>8.2f}"
+            f" {result['max ms']:>8.2f} {result['done']:>9} {result['busy']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
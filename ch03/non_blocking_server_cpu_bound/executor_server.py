@@ -0,0 +1,169 @@
+"""
+An asyncio version of `demo.py`.
+
+Instead of spinning on `BlockingIOError` the event loop sleeps until a socket
+is ready, and a `fib <number>` message, our CPU-bound work, runs in an
+executor through `run_in_executor`, so while it runs the loop keeps
+answering the other clients. Any other message is echoed back right away.
+
+- `thread`: a `ThreadPoolExecutor`, the loop still competes with the workers
+  for the GIL, but gets it back every `sys.getswitchinterval()`
+- `process`: a `ProcessPoolExecutor`, the work runs outside our process
+- `inline`: no executor, the work blocks the loop (what we want to avoid)
+
+Admission control: at most `max_pending` messages can wait for, or run in,
+the executor. Once we're there, a new `fib` message is answered with
+`busy` instead of growing the executor's queue without a bound.
+
+    python -m ch03.non_blocking_server_cpu_bound.executor_server --executor process
+"""
+import argparse
+import asyncio
+import os
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, Set
+
+from ch01.thread_issue_demo import fib
+
+EXECUTORS = {
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+    "inline": None,
+}
+MAX_LINE = 4096
+MAX_FIB = 35
+
+
+class OverloadedError(Exception):
+    pass
+
+
+class Offloader:
+    def __init__(
+        self,
+        executor: str = "thread",
+        pool_size: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self.pool_size = pool_size or os.cpu_count()
+        executor_class = EXECUTORS[executor]
+        self.executor: Optional[Executor] = (
+            executor_class(max_workers=self.pool_size)
+            if executor_class is not None
+            else None
+        )
+        self.max_pending = max_pending or 2 * self.pool_size
+        self.pending = 0
+        self.rejected = 0
+
+    async def run(self, func: Callable, *args):
+        """
+        Run `func(*args)` in the executor,
+        raises `OverloadedError` if `max_pending` calls are already there
+        """
+        if self.executor is None:
+            return func(*args)
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise OverloadedError(f"{self.pending} pending call(s)")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+
+async def reply(message: bytes, offloader: Offloader) -> bytes:
+    if not message.startswith(b"fib "):
+        return message
+    try:
+        number = int(message[4:])
+    except ValueError:
+        return b"bad number"
+    if not 0 <= number <= MAX_FIB:
+        return b"bad number"
+    try:
+        return str(await offloader.run(fib, number)).encode()
+    except OverloadedError:
+        return b"busy"
+
+
+async def handle_client(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    offloader: Offloader,
+    connections: Set[asyncio.StreamWriter],
+) -> None:
+    connections.add(writer)
+    try:
+        while line := await reader.readline():
+            response = await reply(line.rstrip(), offloader)
+            writer.write(b">>Server says: " + response + b"\r\n")
+            await writer.drain()
+    except ValueError as ex:
+        # the line is longer than `MAX_LINE`
+        print(f"Dropping the client: {ex}")
+    except ConnectionError:
+        pass
+    finally:
+        connections.discard(writer)
+        writer.close()
+
+
+async def serve(
+    address: tuple = ("127.0.0.1", 8000),
+    executor: str = "thread",
+    pool_size: Optional[int] = None,
+    max_pending: Optional[int] = None,
+) -> None:
+    """
+    Serve until we get a `SIGINT` or a `SIGTERM`
+    """
+    loop = asyncio.get_running_loop()
+    offloader = Offloader(executor, pool_size, max_pending)
+    connections: Set[asyncio.StreamWriter] = set()
+    stop = asyncio.Event()
+    for signame in {"SIGINT", "SIGTERM"}:
+        loop.add_signal_handler(getattr(signal, signame), stop.set)
+
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_client(
+            reader, writer, offloader, connections
+        ),
+        *address,
+        limit=MAX_LINE,
+        reuse_address=True,
+    )
+    print(f"Listening at: {address} with executor: {executor}")
+    await stop.wait()
+    server.close()
+    for writer in list(connections):
+        writer.close()
+    await server.wait_closed()
+    print(f"Rejected #{offloader.rejected} message(s)")
+    offloader.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--executor", choices=EXECUTORS, default="thread")
+    parser.add_argument("--pool-size", type=int)
+    parser.add_argument("--max-pending", type=int)
+    args = parser.parse_args()
+    asyncio.run(
+        serve(
+            executor=args.executor,
+            pool_size=args.pool_size,
+            max_pending=args.max_pending,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,41 +5,109 @@ Then, any time someone connects to our server socket,
 we’ll register the client’s connection socket with the selector to watch for any data sent.
 If we get any data from a socket that isn’t our server socket,
 we know it is from a client that has sent data. We then receive that data and write it back to the client
+
+Every connection reads its `\r\n` terminated lines with a `LineFramer`.
+`send` on a non-blocking socket writes only what fits in the kernel buffer,
+so every connection keeps its own outbound buffer with the rest.
+While that buffer isn't empty we also watch the socket for `EVENT_WRITE`,
+and once it reaches `max_buffer` bytes we stop reading from that client
+until it catches up, so a slow reader can't make us buffer without limit.
 """
 import selectors
 import socket
-from selectors import DefaultSelector
+from selectors import DefaultSelector, SelectorKey
+
+from ch03 import workers
+from ch03.line_framer import FrameTooLargeError, LineFramer
+
+MAX_BUFFER = 64 * 1024
+
+
+def close_connection(selector: DefaultSelector, conn: socket.socket) -> None:
+    print(f"Closing the connection: {conn}")
+    selector.unregister(conn)
+    conn.close()
 
 
-def create_web_server_socket(address: tuple = ("127.0.0.1", 8000)):
+def flush(selector: DefaultSelector, key: SelectorKey, max_buffer: int):
+    """
+    Send as much of the outbound buffer as the kernel accepts
+    and watch the events that match what is left in it
+    """
+    conn, (_, buffer) = key.fileobj, key.data
+    try:
+        sent = conn.send(buffer)
+    except BlockingIOError:
+        sent = 0
+    del buffer[:sent]
+
+    # pause reading while the buffer is full
+    events = 0 if len(buffer) >= max_buffer else selectors.EVENT_READ
+    if buffer:
+        events |= selectors.EVENT_WRITE
+    if events != key.events:
+        selector.modify(conn, events, key.data)
+
+
+def create_web_server_socket(
+    address: tuple = ("127.0.0.1", 8000),
+    reuse_port: bool = False,
+    max_buffer: int = MAX_BUFFER,
+):
     selector = DefaultSelector()
     server_socket = socket.socket(
         family=socket.AF_INET, type=socket.SOCK_STREAM
     )
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        # Allow the other workers to bind the same address
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
     server_socket.bind(address)
     print(f"Listening at: {address}")
     server_socket.listen()
     selector.register(server_socket, selectors.EVENT_READ)
     # Serve
-    while True:
-        events = selector.select(timeout=1)
-        if len(events) == 0:
-            print("No events yet,waiting a bit more!")
-        for event, _ in events:
-            event_socket = event.fileobj
-
-            if event_socket == server_socket:
-                # we have a new connection
-                conn, address = server_socket.accept()
-                conn.setblocking(False)
-                # create a small buffer
-                selector.register(conn, selectors.EVENT_READ)
-            else:
-                data = event_socket.recv(1024)
-                print(f"I got some data: {data}")
-                event_socket.send(b"server says:" + data)
+    try:
+        while True:
+            events = selector.select(timeout=1)
+            if len(events) == 0:
+                print("No events yet,waiting a bit more!")
+            for key, mask in events:
+                event_socket = key.fileobj
+
+                if event_socket == server_socket:
+                    # we have a new connection
+                    conn, address = server_socket.accept()
+                    conn.setblocking(False)
+                    # create the inbound and outbound buffers of the connection
+                    selector.register(
+                        conn, selectors.EVENT_READ, (LineFramer(), bytearray())
+                    )
+                    continue
+
+                if mask & selectors.EVENT_READ:
+                    framer, buffer = key.data
+                    try:
+                        received = framer.recv_into(event_socket)
+                    except (ConnectionError, FrameTooLargeError):
+                        received = 0
+                    if not received:
+                        # the client closed the connection
+                        close_connection(selector, event_socket)
+                        continue
+                    for frame in framer.frames():
+                        print(f"I got some data: {frame.tobytes()}")
+                        buffer += b"server says:"
+                        buffer += frame
+                try:
+                    flush(selector, key, max_buffer)
+                except ConnectionError:
+                    close_connection(selector, event_socket)
+    finally:
+        print("Closing the web-socket")
+        selector.close()
+        server_socket.close()
 
 
 if __name__ == "__main__":
-    create_web_server_socket()
+    workers.main(create_web_server_socket)
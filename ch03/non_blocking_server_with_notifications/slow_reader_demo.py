@@ -0,0 +1,130 @@
+"""
+Slow reader load test for the selector server.
+
+Our clients send as fast as they can but never read the echoes back.
+Once the kernel buffers fill up, the server keeps the echoes in the
+connection's outbound buffer, and when that reaches `max_buffer`
+it stops reading from the client, so the server memory stays bounded.
+For comparison we run the same clients against a server whose buffers
+are practically unbounded.
+
+The kernel socket buffers absorb the first few MB of every connection,
+so the run has to last long enough for the unbounded buffers to grow well
+past them. It exits with an error if the RSS of the bounded server grows
+by more than `clients * max_buffer` plus `slack` MB, or if the unbounded
+one doesn't, i.e. the run was too short to tell them apart.
+
+    python -m ch03.non_blocking_server_with_notifications.slow_reader_demo
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+from ch03.non_blocking_server_with_notifications.demo import (
+    MAX_BUFFER,
+    create_web_server_socket,
+)
+
+ADDRESS = ("127.0.0.1", 8002)
+CHUNK = b"x" * 1022 + b"\r\n"
+
+
+def rss_mb(pid: int) -> float:
+    """
+    Resident memory of a process (linux only)
+    """
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_server(max_buffer: int) -> None:
+    sys.stdout = open(os.devnull, "w")
+    create_web_server_socket(ADDRESS, max_buffer=max_buffer)
+
+
+def slow_readers(
+    server_pid: int, clients: int, limit: int, seconds: float
+) -> float:
+    """
+    Send up to `limit` bytes from each client without ever reading,
+    returns the peak RSS of the server in MB
+    """
+    connections = [socket.create_connection(ADDRESS) for _ in range(clients)]
+    for conn in connections:
+        conn.setblocking(False)
+    sent = 0
+    peak = rss_mb(server_pid)
+    start = time.monotonic()
+    next_sample = start
+    while time.monotonic() - start < seconds and sent < limit * clients:
+        for conn in connections:
+            try:
+                sent += conn.send(CHUNK)
+            except BlockingIOError:
+                # the server stopped reading from us
+                pass
+        if time.monotonic() >= next_sample:
+            rss = rss_mb(server_pid)
+            peak = max(peak, rss)
+            print(f"  sent: {sent / 2**20:8.1f} MB  server rss: {rss:8.1f} MB")
+            next_sample += 0.5
+        else:
+            time.sleep(0)
+    for conn in connections:
+        conn.close()
+    return max(peak, rss_mb(server_pid))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--limit-mb", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=8)
+    # interpreter and allocator noise on top of the buffers
+    parser.add_argument("--slack-mb", type=float, default=4)
+    args = parser.parse_args()
+
+    allowed = args.clients * MAX_BUFFER / 2**20 + args.slack_mb
+    growth = {}
+    for name, max_buffer in {
+        "bounded": MAX_BUFFER,
+        "unbounded": 2**40,
+    }.items():
+        print(f"{name} outbound buffer:")
+        server = multiprocessing.Process(target=run_server, args=(max_buffer,))
+        server.start()
+        time.sleep(0.5)
+        try:
+            baseline = rss_mb(server.pid)
+            peak = slow_readers(
+                server.pid, args.clients, args.limit_mb * 2**20, args.seconds
+            )
+        finally:
+            server.terminate()
+            server.join()
+        growth[name] = peak - baseline
+        print(f"  rss growth: {growth[name]:.1f} MB (allowed {allowed:.1f} MB)")
+
+    failures = []
+    if growth["bounded"] > allowed:
+        failures.append(
+            f"the bounded server grew by {growth['bounded']:.1f} MB"
+        )
+    if growth["unbounded"] <= allowed:
+        failures.append(
+            "the unbounded server stayed within the limit too,"
+            " run it for longer"
+        )
+    if failures:
+        sys.exit("FAILED: " + "; ".join(failures))
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+One process can use only one core, so to scale our servers we can fork
+several worker processes that all bind the same address.
+With `SO_REUSEPORT` the kernel allows that and spreads the incoming
+connections between the listening sockets.
+
+The supervisor forwards `SIGINT`/`SIGTERM` to every worker so each one
+goes through its own graceful shutdown.
+The workers run in their own process group, so a `CTRL-C` in the terminal
+reaches them only once, through the supervisor.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+from typing import Callable, List
+
+ADDRESS = ("127.0.0.1", 8000)
+
+
+def parse_workers() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes sharing the address (SO_REUSEPORT)",
+    )
+    return parser.parse_args().workers
+
+
+def run_worker(target: Callable, address: tuple) -> None:
+    os.setpgrp()
+    # a blocking server only cleans up on a `KeyboardInterrupt`,
+    # the asyncio servers install their own handlers on the loop
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        target(address=address, reuse_port=True)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_workers(target: Callable, workers: int, address: tuple = ADDRESS):
+    """
+    Start `workers` processes running `target(address, reuse_port=True)`
+    and wait for all of them to exit
+    """
+    processes: List[multiprocessing.Process] = [
+        multiprocessing.Process(target=run_worker, args=(target, address))
+        for _ in range(workers)
+    ]
+
+    def propagate(signum: int, _frame) -> None:
+        print(f"Got signal: {signum}, stopping #{workers} worker(s)")
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    for signum in {signal.SIGINT, signal.SIGTERM}:
+        signal.signal(signum, propagate)
+
+    for process in processes:
+        process.start()
+    print(f"Started #{workers} worker(s) at: {address}")
+    for process in processes:
+        process.join()
+
+
+def main(target: Callable) -> None:
+    """
+    Run `target` in this process or, with `--workers N`, in N workers
+    """
+    workers = parse_workers()
+    if workers > 1:
+        run_workers(target, workers)
+    else:
+        target()
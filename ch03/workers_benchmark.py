@@ -0,0 +1,98 @@
+"""
+Throughput of the `gracefull_shutdown.py` echo server as we add workers.
+
+For every worker count from 1 to N we start the server with
+`run_workers`, spread the client connections over as many client processes
+and measure the total requests/sec.
+
+    python -m ch03.workers_benchmark --max-workers 4 --connections 1000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from typing import List, Tuple
+
+from ch03.cancelling_tasks.engine_benchmark import (
+    percentile,
+    raise_open_files_limit,
+    run_clients,
+)
+from ch03.cancelling_tasks.gracefull_shutdown import run
+from ch03.workers import run_workers
+
+ADDRESS = ("127.0.0.1", 8001)
+
+
+def run_server(workers: int) -> None:
+    sys.stdout = open(os.devnull, "w")
+    run_workers(run, workers, ADDRESS)
+
+
+def wait_for_server(timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(ADDRESS).close()
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+    # give the rest of the workers the time to bind as well
+    time.sleep(0.5)
+
+
+def run_client_process(args: Tuple[int, int]) -> Tuple[float, List[int]]:
+    connections, requests = args
+    return asyncio.run(run_clients(ADDRESS, connections, requests))
+
+
+def benchmark(workers: int, connections: int, requests: int) -> Tuple:
+    server = multiprocessing.Process(target=run_server, args=(workers,))
+    server.start()
+    try:
+        wait_for_server()
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(
+                run_client_process,
+                [(connections // workers, requests)] * workers,
+            )
+    finally:
+        # goes through the supervisor to every worker
+        server.terminate()
+        server.join()
+
+    total = max(elapsed for elapsed, _ in results)
+    latencies = sorted(
+        latency
+        for _, client_latencies in results
+        for latency in client_latencies
+    )
+    return len(latencies) / total, percentile(latencies, 99) / 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    raise_open_files_limit(args.connections)
+    print(f"{'workers':>7} {'requests/sec':>13} {'speedup':>8} {'p99 ms':>8}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        throughput, p99 = benchmark(workers, args.connections, args.requests)
+        baseline = baseline or throughput
+        print(
+            f"{workers:>7} {throughput:>13.0f}"
+            f" {throughput / baseline:>8.2f} {p99:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+`timeouts_demo.fetch_status` uses `ClientTimeout(total=0.2)` for every host,
+too tight for a slow host and too loose for a fast one.
+
+Here every host gets its own timeout: a multiple of the p99 latency of its
+responses in the last minute, so after a latency spike the timeout comes
+back down once the spike is out of the window. Only the responses count:
+a timed out request would push the p99 towards the timeout itself, and a
+refused connection would drag it down. Instead, every timeout in a row
+widens the timeout of the host by `widen`, until a response comes back:
+when a host slows down past its timeout we get responses again,
+and their latencies move the p99 up.
+A failed request is retried after a decorrelated jittered backoff,
+`sleep = min(cap, uniform(base, 3 * previous sleep))`,
+so the clients that failed together don't retry together.
+Every request adds `ratio` to a shared retry budget and every retry takes 1
+out of it, so when a dependency slows down we retry at most `ratio` of
+our requests instead of multiplying the load on it.
+"""
+import asyncio
+import random
+from time import perf_counter_ns
+from typing import Dict, Optional
+
+import aiohttp
+from aiohttp import ClientSession
+from yarl import URL
+
+from metrics import WindowedHistogram
+
+
+class AdaptiveTimeout:
+    def __init__(
+        self,
+        default: float = 1,
+        multiplier: float = 2,
+        minimum: float = 0.05,
+        maximum: float = 10,
+        min_samples: int = 20,
+        interval: float = 10,
+        windows: int = 6,
+        widen: float = 2,
+    ):
+        self.default = default
+        self.multiplier = multiplier
+        self.minimum = minimum
+        self.maximum = maximum
+        self.min_samples = min_samples
+        self.interval = interval
+        self.windows = windows
+        self.widen = widen
+        self.latencies: Dict[str, WindowedHistogram] = {}
+        # host -> `widen` ** timeouts in a row
+        self.widened: Dict[str, float] = {}
+
+    def record(self, host: str, seconds: float) -> None:
+        latencies = self.latencies.get(host)
+        if latencies is None:
+            latencies = self.latencies[host] = WindowedHistogram(
+                self.interval, self.windows
+            )
+        latencies.record(int(seconds * 1e9))
+        self.widened.pop(host, None)
+
+    def on_timeout(self, host: str) -> None:
+        # stop widening once we are at `maximum` whatever the p99
+        self.widened[host] = min(
+            self.widened.get(host, 1) * self.widen, self.maximum / self.minimum
+        )
+
+    def timeout(self, host: str) -> float:
+        latencies = self.latencies.get(host)
+        if latencies is None or latencies.count < self.min_samples:
+            timeout = self.default
+        else:
+            timeout = self.multiplier * latencies.percentile(99) / 1e9
+        timeout *= self.widened.get(host, 1)
+        return min(max(timeout, self.minimum), self.maximum)
+
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.1, reserve: float = 10):
+        self.ratio = ratio
+        # lets the first requests retry before the budget fills up
+        self.reserve = reserve
+        self.tokens = reserve
+        self.retries = 0
+        self.rejected = 0
+
+    def on_request(self) -> None:
+        self.tokens = min(self.tokens + self.ratio, self.reserve)
+
+    def try_retry(self) -> bool:
+        if self.tokens < 1:
+            self.rejected += 1
+            return False
+        self.tokens -= 1
+        self.retries += 1
+        return True
+
+
+def decorrelated_jitter(previous: float, base: float, cap: float) -> float:
+    return min(cap, random.uniform(base, previous * 3))
+
+
+timeouts = AdaptiveTimeout()
+budget = RetryBudget()
+
+
+async def fetch_status(
+    session: ClientSession,
+    url: str,
+    attempts: int = 3,
+    base: float = 0.05,
+    cap: float = 2,
+    timeout: Optional[AdaptiveTimeout] = None,
+    retry_budget: Optional[RetryBudget] = None,
+) -> int:
+    """
+    Perform a simple async http `GET` request with an adaptive timeout,
+    retrying timeouts and connection errors while the budget allows it
+    """
+    timeout = timeout or timeouts
+    retry_budget = retry_budget or budget
+    host = str(URL(url).origin())
+    retry_budget.on_request()
+    sleep = base
+    for attempt in range(1, attempts + 1):
+        start = perf_counter_ns()
+        try:
+            client_timeout = aiohttp.ClientTimeout(total=timeout.timeout(host))
+            async with session.get(url, timeout=client_timeout) as result:
+                timeout.record(host, (perf_counter_ns() - start) / 1e9)
+                return result.status
+        except (asyncio.TimeoutError, aiohttp.ClientError) as ex:
+            if isinstance(ex, asyncio.TimeoutError):
+                timeout.on_timeout(host)
+            if attempt == attempts or not retry_budget.try_retry():
+                raise
+        sleep = decorrelated_jitter(sleep, base, cap)
+        await asyncio.sleep(sleep)
+
+
+async def main():
+    async with aiohttp.ClientSession() as session:
+        url = "https://www.google.com"
+        for _ in range(30):
+            status = await fetch_status(session=session, url=url)
+            print(f"Status code from: {url} is: {status}")
+        host = str(URL(url).origin())
+        print(f"Timeout for {host}: {timeouts.timeout(host):.3f} sec(s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
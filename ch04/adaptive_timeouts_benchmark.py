@@ -0,0 +1,101 @@
+"""
+The fixed `ClientTimeout(total=0.2)` of `timeouts_demo.fetch_status`
+against adaptive timeouts with budgeted retries, on three local hosts:
+- fast: 10ms, with a 2% of 150ms outliers
+- slow: 300ms, always above the fixed timeout
+- overloaded: 3s, its first requests time out, every timeout in a row
+  widens its timeout until the responses come back, and the retry budget
+  keeps us from multiplying the load on it
+
+    python -m ch04.adaptive_timeouts_benchmark
+"""
+import argparse
+import asyncio
+import math
+import time
+from time import perf_counter
+from typing import Dict
+
+from aiohttp import ClientSession
+
+from ch04.adaptive_timeouts import AdaptiveTimeout, RetryBudget, fetch_status
+from ch04.local_server import make_url, start_server
+
+HOSTS = {
+    "fast": (
+        ("127.0.0.1", 8080),
+        {"delay": 0.01, "outlier_rate": 0.02, "outlier_delay": 0.15},
+    ),
+    "slow": (("127.0.0.1", 8081), {"delay": 0.3}),
+    "overloaded": (("127.0.0.1", 8082), {"delay": 3}),
+}
+
+
+async def run(
+    name: str, requests: int, attempts: int, timeout: AdaptiveTimeout
+) -> None:
+    budget = RetryBudget()
+    results: Dict[str, Dict] = {
+        host: {"ok": 0, "failed": 0, "seconds": 0.0} for host in HOSTS
+    }
+
+    async def request(host: str, i: int) -> None:
+        address, query = HOSTS[host]
+        start = perf_counter()
+        try:
+            await fetch_status(
+                session,
+                make_url(str(i), address=address, **query),
+                attempts=attempts,
+                timeout=timeout,
+                retry_budget=budget,
+            )
+            results[host]["ok"] += 1
+        except Exception:
+            results[host]["failed"] += 1
+        results[host]["seconds"] += perf_counter() - start
+
+    async with ClientSession() as session:
+        # a few at a time, so the timeouts can learn from the first requests
+        for batch in range(0, requests, 10):
+            await asyncio.gather(
+                *[
+                    request(host, i)
+                    for host in HOSTS
+                    for i in range(batch, min(batch + 10, requests))
+                ]
+            )
+
+    print(
+        f"{name}: retries {budget.retries},"
+        f" rejected by the budget {budget.rejected}"
+    )
+    for host, result in results.items():
+        (ip, port), _ = HOSTS[host]
+        host_timeout = timeout.timeout(f"http://{ip}:{port}")
+        print(
+            f"  {host:<11} ok: {result['ok']:>4} failed: {result['failed']:>4}"
+            f" mean: {result['seconds'] / requests:6.3f}s"
+            f" timeout: {host_timeout:.3f}s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    servers = [start_server(address) for address, _ in HOSTS.values()]
+    try:
+        fixed = AdaptiveTimeout(default=0.2, min_samples=math.inf)
+        asyncio.run(run("fixed 0.2s", args.requests, 1, fixed))
+        asyncio.run(run("adaptive", args.requests, 3, AdaptiveTimeout()))
+        # let the servers answer the requests we gave up on
+        time.sleep(max(query["delay"] for _, query in HOSTS.values()))
+    finally:
+        for server in servers:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,22 @@
 """
 With `asyncio.gather` we have to wait until all the tasks complete.
 but with `as_completed` we can use the results
+
+The three tasks ask for the same url, with `fetch_cache.fetch_status`
+only the first one sends a request, the others get the cached status.
 """
 
 import asyncio
 
 from aiohttp import ClientSession
 
+from ch04.fetch_cache import fetch_status
+
 
 async def fetch(session: ClientSession, url: str, sleep: int) -> int:
     print(f"Go to sleep before fetching the: {url} for {sleep}")
     await asyncio.sleep(sleep)
-    async with session.get(url) as result:
-        return result.status
+    return await fetch_status(session, url)
 
 
 async def main():
@@ -34,6 +38,7 @@ async def main():
 
         for task in asyncio.tasks.all_tasks():
             print(task)
+        print(f"Cache: {fetch_status.caches[session].snapshot()}")
 
 
 if __name__ == "__main__":
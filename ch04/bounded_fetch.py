@@ -0,0 +1,110 @@
+"""
+`asyncio.gather(*requests)` needs every coroutine up front,
+with 100k urls that's 100k coroutines (and tasks) alive at once.
+
+Instead, a producer feeds the urls into a bounded queue and a fixed pool of
+`concurrency` workers fetch them, so we never hold more than about
+`concurrency` urls, requests and results in memory, whatever the input size.
+The results are yielded in the order the requests finish.
+"""
+import asyncio
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Tuple,
+    Union,
+)
+
+from aiohttp import ClientSession
+
+from tools import async_timed
+
+Urls = Union[Iterable[str], AsyncIterable[str]]
+
+
+async def fetch(session: ClientSession, url: str) -> int:
+    """
+    `gather_demo.fetch` without the prints of `async_timed`
+    """
+    async with session.get(url) as result:
+        return result.status
+
+
+async def iterate(urls: Urls) -> AsyncIterator[str]:
+    if hasattr(urls, "__aiter__"):
+        async for url in urls:
+            yield url
+    else:
+        for url in urls:
+            yield url
+
+
+async def fetch_all(
+    session: ClientSession,
+    urls: Urls,
+    concurrency: int = 100,
+    fetch: Callable = fetch,
+) -> AsyncIterator[Tuple[str, Union[int, Exception]]]:
+    """
+    Yield `(url, status code or exception)` for every url,
+    with at most `concurrency` requests in flight.
+    To stop the workers as soon as we `break` out of the loop,
+    iterate over `contextlib.aclosing(fetch_all(...))`
+    """
+    url_queue: asyncio.Queue = asyncio.Queue(concurrency)
+    results: asyncio.Queue = asyncio.Queue(concurrency)
+
+    async def stop_workers() -> None:
+        # one `None` per worker: no more urls
+        for _ in range(concurrency):
+            await url_queue.put(None)
+
+    async def produce() -> None:
+        try:
+            async for url in iterate(urls):
+                await url_queue.put(url)
+        except Exception:
+            await stop_workers()
+            raise
+        await stop_workers()
+
+    async def work() -> None:
+        while (url := await url_queue.get()) is not None:
+            try:
+                status = await fetch(session=session, url=url)
+            except Exception as ex:
+                status = ex
+            await results.put((url, status))
+        await results.put(None)
+
+    producer = asyncio.create_task(produce())
+    workers = [asyncio.create_task(work()) for _ in range(concurrency)]
+    try:
+        finished = 0
+        while finished < concurrency:
+            result = await results.get()
+            if result is None:
+                finished += 1
+            else:
+                yield result
+        # raise the exception of the urls iterable, if any
+        await producer
+    finally:
+        # the consumer may stop early, don't leave any task behind
+        for task in [producer, *workers]:
+            task.cancel()
+        await asyncio.gather(producer, *workers, return_exceptions=True)
+
+
+@async_timed()
+async def main():
+    async with ClientSession() as session:
+        urls = ["https://google.com", "https://bbc.com", "http://python.org"]
+        async for url, status in fetch_all(session, urls * 10, concurrency=5):
+            print(f"{url}: {status}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Peak memory and throughput of `bounded_fetch.fetch_all` compared with a plain
+`asyncio.gather` over every url, against `local_server.py`.
+
+Every run happens in its own process, so its peak RSS is its own.
+
+    python -m ch04.bounded_fetch_benchmark --urls 10000 100000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import resource
+from time import perf_counter
+from typing import Tuple
+
+from aiohttp import ClientSession
+
+from ch04.bounded_fetch import fetch, fetch_all
+from ch04.local_server import make_url, start_server
+
+
+async def with_gather(urls: int, concurrency: int) -> None:
+    async with ClientSession() as session:
+        requests = [
+            fetch(session=session, url=make_url(str(i))) for i in range(urls)
+        ]
+        await asyncio.gather(*requests, return_exceptions=True)
+
+
+async def with_fetch_all(urls: int, concurrency: int) -> None:
+    async with ClientSession() as session:
+        async for _ in fetch_all(
+            session,
+            (make_url(str(i)) for i in range(urls)),
+            concurrency=concurrency,
+        ):
+            pass
+
+
+def run(mode: str, urls: int, concurrency: int) -> Tuple[float, float]:
+    """
+    Returns the requests/sec and the peak RSS in MB
+    """
+    start = perf_counter()
+    asyncio.run(MODES[mode](urls, concurrency))
+    elapsed = perf_counter() - start
+    # kilobytes on linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return urls / elapsed, peak
+
+
+MODES = {"gather": with_gather, "fetch_all": with_fetch_all}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    server = start_server()
+    print(f"{'mode':<10} {'urls':>7} {'requests/sec':>13} {'peak rss MB':>12}")
+    try:
+        with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+            for urls in args.urls:
+                for mode in MODES:
+                    throughput, peak = pool.apply(
+                        run, (mode, urls, args.concurrency)
+                    )
+                    print(
+                        f"{mode:<10} {urls:>7} {throughput:>13.0f}"
+                        f" {peak:>12.1f}"
+                    )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
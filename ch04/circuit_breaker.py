@@ -0,0 +1,140 @@
+"""
+A circuit breaker per host (scheme, host and port).
+
+- closed: requests go through, we keep the outcome of the last `window` ones.
+  Once at least `min_requests` of them failed at a rate of `failure_rate`,
+  the breaker opens
+- open: requests fail at once with `CircuitOpenError`, without taking a
+  connection slot or waiting for a timeout. After `reset_timeout` seconds
+  the breaker becomes half-open
+- half-open: `probes` requests go through to test the host,
+  a success closes the breaker and a failure opens it again.
+  Only the probes count: a request sent while the breaker was closed
+  can still be in flight, its outcome is about the host as it was then
+
+`before_request` returns a token marking the probes, we pass it back
+to `on_success` / `on_failure` / `on_cancel`.
+"""
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+from aiohttp import ClientSession
+from yarl import URL
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_requests: int = 5,
+        window: int = 20,
+        reset_timeout: float = 5,
+        probes: int = 1,
+    ):
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+        # `True` for a failure
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        # the half-open periods so far, a probe's token is its period
+        self.half_opened = 0
+
+    def open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+
+    def before_request(self) -> Optional[int]:
+        """
+        Raises `CircuitOpenError` if the request shouldn't be sent,
+        returns the token of a probe or `None` for a regular request
+        """
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"The circuit is {self.state}")
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+            self.half_opened += 1
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.probes:
+                raise CircuitOpenError(f"The circuit is {self.state}")
+            self.probes_in_flight += 1
+            return self.half_opened
+        return None
+
+    def is_probe(self, token: Optional[int]) -> bool:
+        """
+        A probe of the current half-open period,
+        not a late one from a period that is over
+        """
+        return self.state == HALF_OPEN and token == self.half_opened
+
+    def on_success(self, token: Optional[int] = None) -> None:
+        if self.is_probe(token):
+            self.state = CLOSED
+            self.outcomes.clear()
+        elif self.state != HALF_OPEN:
+            self.outcomes.append(False)
+
+    def on_failure(self, token: Optional[int] = None) -> None:
+        if self.is_probe(token):
+            self.open()
+            return
+        if self.state == HALF_OPEN:
+            return
+        self.outcomes.append(True)
+        failures = sum(self.outcomes)
+        if (
+            self.state == CLOSED
+            and failures >= self.min_requests
+            and failures / len(self.outcomes) >= self.failure_rate
+        ):
+            self.open()
+
+    def on_cancel(self, token: Optional[int] = None) -> None:
+        # a cancelled probe tells us nothing, let another one try
+        if self.is_probe(token):
+            self.probes_in_flight -= 1
+
+
+breakers: Dict[str, CircuitBreaker] = defaultdict(CircuitBreaker)
+
+
+async def fetch(
+    session: ClientSession,
+    url: str,
+    circuit_breakers: Dict[str, CircuitBreaker] = breakers,
+) -> int:
+    """
+    `GET` through the breaker of the url's host,
+    an exception or a 5xx status counts as a failure
+    """
+    breaker = circuit_breakers[str(URL(url).origin())]
+    token = breaker.before_request()
+    try:
+        async with session.get(url) as result:
+            status = result.status
+    except asyncio.CancelledError:
+        breaker.on_cancel(token)
+        raise
+    except Exception:
+        breaker.on_failure(token)
+        raise
+    if status >= 500:
+        breaker.on_failure(token)
+    else:
+        breaker.on_success(token)
+    return status
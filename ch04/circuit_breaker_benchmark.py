@@ -0,0 +1,113 @@
+"""
+Rounds of `gather` fan-out over healthy and blackholed hosts,
+with and without a circuit breaker per host.
+
+A blackholed host is a socket that listens but never accepts:
+the connection hangs until the client timeout, like a host that dropped
+off the network. Without breakers every round waits for that timeout,
+with them only the rounds that probe the host do.
+
+    python -m ch04.circuit_breaker_benchmark --rounds 20
+"""
+import argparse
+import asyncio
+import socket
+from collections import defaultdict
+from time import perf_counter
+from typing import Dict, List
+
+from aiohttp import ClientSession, ClientTimeout
+
+from ch04 import circuit_breaker
+from ch04.bounded_fetch import fetch
+from ch04.circuit_breaker import CircuitBreaker
+from ch04.gather_with_exceptions import split_results
+from ch04.local_server import make_url, start_server
+
+HEALTHY = [("127.0.0.1", 8080), ("127.0.0.1", 8081)]
+
+
+def blackhole() -> socket.socket:
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.bind(("127.0.0.1", 0))
+    server_socket.listen(1)
+    return server_socket
+
+
+def percentile(values: List[float], percent: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def run(
+    name: str, urls: List[str], rounds: int, timeout: float, breakers: bool
+) -> None:
+    circuit_breakers: Dict[str, CircuitBreaker] = defaultdict(
+        lambda: CircuitBreaker(reset_timeout=2)
+    )
+    ok = failed = short_circuited = 0
+    durations = []
+    async with ClientSession(timeout=ClientTimeout(total=timeout)) as session:
+        start = perf_counter()
+        for _ in range(rounds):
+            round_start = perf_counter()
+            if breakers:
+                requests = [
+                    circuit_breaker.fetch(session, url, circuit_breakers)
+                    for url in urls
+                ]
+            else:
+                requests = [fetch(session, url) for url in urls]
+            results = await asyncio.gather(*requests, return_exceptions=True)
+            durations.append(perf_counter() - round_start)
+            successful_results, short, exceptions = split_results(results)
+            ok += len(successful_results)
+            short_circuited += len(short)
+            failed += len(exceptions)
+        total = perf_counter() - start
+
+    durations.sort()
+    print(
+        f"{name:<17} {total:>7.2f}s"
+        f" {percentile(durations, 50):>9.3f}s {durations[-1]:>8.3f}s"
+        f" {ok:>6} {failed:>7} {short_circuited:>16}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=20, help="per host")
+    parser.add_argument("--blackholed", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=1)
+    args = parser.parse_args()
+
+    servers = [start_server(address) for address in HEALTHY]
+    blackholes = [blackhole() for _ in range(args.blackholed)]
+    addresses = HEALTHY + [sock.getsockname() for sock in blackholes]
+    urls = [
+        make_url(str(i), address=address, delay=0.01)
+        for address in addresses
+        for i in range(args.requests)
+    ]
+    print(
+        f"{len(HEALTHY)} healthy and {args.blackholed} blackholed hosts,"
+        f" {len(urls)} requests per round, timeout {args.timeout}s"
+    )
+    print(
+        f"{'':<17} {'total':>8} {'round p50':>10} {'max':>9}"
+        f" {'ok':>6} {'failed':>7} {'short-circuited':>16}"
+    )
+    try:
+        asyncio.run(run("no breaker", urls, args.rounds, args.timeout, False))
+        asyncio.run(
+            run("circuit breaker", urls, args.rounds, args.timeout, True)
+        )
+    finally:
+        for server in servers:
+            server.terminate()
+        for sock in blackholes:
+            sock.close()
+
+
+if __name__ == "__main__":
+    main()
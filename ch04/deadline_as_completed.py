@@ -0,0 +1,142 @@
+"""
+`asyncio.as_completed(..., timeout=11)` raises a `TimeoutError` for the
+tasks that didn't finish in time but doesn't cancel them,
+they keep running (and holding their connections) in the background.
+
+This `as_completed` is an async iterator that yields every task as it finishes,
+and cancels the tasks that miss their deadline.
+Each task can have its own deadline, and there can be a global one as well.
+Before going on, we wait for the cancelled tasks to run their cleanup,
+e.g. the `async with session.get(...)` that gives the connection back to the pool.
+"""
+import asyncio
+import heapq
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from aiohttp import ClientSession
+
+
+async def cancel_and_reap(tasks: Iterable[asyncio.Future]) -> None:
+    tasks = list(tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def timed_out() -> asyncio.Future:
+    future = asyncio.get_running_loop().create_future()
+    future.set_exception(asyncio.TimeoutError())
+    return future
+
+
+async def as_completed(
+    aws: Union[Iterable[Awaitable], Mapping[Awaitable, Optional[float]]],
+    timeout: Optional[float] = None,
+    task_timeout: Optional[float] = None,
+) -> AsyncIterator[asyncio.Future]:
+    """
+    Yield a finished future for every awaitable, in completion order,
+    `await` it to get its result or its exception.
+
+    A task that runs for more than its timeout, `task_timeout` or its value
+    when `aws` is a mapping, is cancelled and yielded as a `TimeoutError`.
+    When the global `timeout` expires, all the pending tasks are cancelled
+    and the iteration raises a `TimeoutError`
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = None if timeout is None else start + timeout
+    if not isinstance(aws, Mapping):
+        aws = dict.fromkeys(aws, task_timeout)
+
+    pending: Set[asyncio.Future] = set()
+    # (deadline, order, task) of the tasks with a deadline, earliest first
+    deadlines: List[Tuple[float, int, asyncio.Future]] = []
+    for order, (aw, aw_timeout) in enumerate(aws.items()):
+        task = asyncio.ensure_future(aw)
+        pending.add(task)
+        if aw_timeout is not None:
+            heapq.heappush(deadlines, (start + aw_timeout, order, task))
+
+    try:
+        while pending:
+            # skip the deadlines of the tasks that already finished
+            while deadlines and deadlines[0][2] not in pending:
+                heapq.heappop(deadlines)
+            wake_ups = [deadlines[0][0]] if deadlines else []
+            if deadline is not None:
+                wake_ups.append(deadline)
+            wake_up = min(wake_ups, default=None)
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=None if wake_up is None else wake_up - loop.time(),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                pending.discard(task)
+                yield task
+
+            # the consumer may have taken a while with the tasks we yielded,
+            # the tasks that finished in the meantime are yielded by the
+            # next `wait`, not timed out
+            now = loop.time()
+            if deadline is not None and now >= deadline:
+                if not any(task.done() for task in pending):
+                    raise asyncio.TimeoutError()
+                continue
+            expired = []
+            while deadlines and deadlines[0][0] <= now:
+                _, _, task = heapq.heappop(deadlines)
+                if task in pending and not task.done():
+                    pending.discard(task)
+                    expired.append(task)
+            if expired:
+                await cancel_and_reap(expired)
+                for _ in expired:
+                    yield timed_out()
+    finally:
+        # global timeout, an exception or the consumer stopped early
+        await cancel_and_reap(pending)
+
+
+async def fetch(session: ClientSession, url: str, sleep: int) -> int:
+    print(f"Go to sleep before fetching the: {url} for {sleep}")
+    await asyncio.sleep(sleep)
+    async with session.get(url) as result:
+        return result.status
+
+
+async def main():
+    """
+    The same tasks as `as_completed_demo.py`,
+    but each task has 11 seconds and nothing is left behind
+    """
+    async with ClientSession() as session:
+        tasks = [
+            fetch(session=session, url="http://www.python.org", sleep=1),
+            fetch(session=session, url="http://www.python.org", sleep=10),
+            fetch(session=session, url="http://www.python.org", sleep=15),
+        ]
+        async for done_task in as_completed(tasks, task_timeout=11):
+            try:
+                result = await done_task
+                print(result)
+            except asyncio.TimeoutError:
+                print("We got a timeout error:")
+
+        for task in asyncio.tasks.all_tasks():
+            print(task)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+"""
+A cache in front of our `fetch` helpers.
+
+- concurrent calls for the same url share one in-flight request
+  (singleflight), instead of sending it once per caller
+- a completed response is cached for `ttl` seconds, and once we have
+  `maxsize` of them the least recently used one is evicted.
+  Failed requests are not cached, only shared with the callers
+  that were already waiting for them
+
+Each caller awaits the shared request through `asyncio.shield`,
+so a caller that gets cancelled (by a timeout for example) doesn't cancel
+the request for the others. When the last caller is cancelled nobody needs
+the request anymore and it is cancelled too.
+
+The cache is opt-in: `fetch_status` is a cached `fetch` for the call sites
+that want one (`gather_demo.main`, `as_completed_demo`), or decorate our own
+with `cached()`. Every session gets a cache of its own, keyed by url, which
+goes away with the session. `wait_demo.fetch` doesn't use it:
+`main_first_complete` races two requests for the same url on purpose,
+each one holding its connection for its delay, coalescing them would leave
+one request and nothing to race.
+"""
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from aiohttp import ClientSession
+
+
+class Flight:
+    """
+    A request in flight and how many callers are waiting for it
+    """
+
+    def __init__(self, request: asyncio.Future):
+        self.request = request
+        self.waiters = 0
+
+
+class FetchCache:
+    def __init__(self, ttl: float = 60, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # key -> (expires at, result), least recently used first
+        self.entries: OrderedDict = OrderedDict()
+        self.in_flight: Dict[Hashable, Flight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable]) -> Any:
+        """
+        The cached result for `key`, or the result of `fetch()`
+        shared with the other callers asking for `key` at the same time
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result
+            del self.entries[key]
+
+        flight = self.in_flight.get(key)
+        if flight is None:
+            self.misses += 1
+            flight = Flight(asyncio.ensure_future(fetch()))
+            self.in_flight[key] = flight
+            flight.request.add_done_callback(
+                lambda request: self.on_done(key, request)
+            )
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.request)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.request.done():
+                # the next caller starts a new request instead of
+                # waiting for this one to be cancelled
+                del self.in_flight[key]
+                flight.request.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def on_done(self, key: Hashable, request: asyncio.Future) -> None:
+        flight = self.in_flight.get(key)
+        if flight is not None and flight.request is request:
+            del self.in_flight[key]
+        if request.cancelled() or request.exception() is not None:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, request.result())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self.entries),
+            "in_flight": len(self.in_flight),
+        }
+
+
+def url_key(session: ClientSession, url: str, *args, **kwargs) -> Hashable:
+    return url
+
+
+def session_of(*args, **kwargs) -> ClientSession:
+    return kwargs["session"] if "session" in kwargs else args[0]
+
+
+def cached(
+    ttl: float = 60,
+    maxsize: int = 1024,
+    key: Callable[..., Hashable] = url_key,
+) -> Callable:
+    """
+    Cache the results of the decorated `fetch(session, url, ...)`
+    by `key(session, url, ...)` in a `FetchCache` per session,
+    the caches are the `caches` attribute of the returned function
+    """
+
+    def outer(func: Callable) -> Callable:
+        caches: "weakref.WeakKeyDictionary[ClientSession, FetchCache]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        @wraps(func)
+        async def inner(*args, **kwargs) -> Any:
+            session = session_of(*args, **kwargs)
+            cache = caches.get(session)
+            if cache is None:
+                cache = caches[session] = FetchCache(ttl=ttl, maxsize=maxsize)
+            return await cache.get(
+                key(*args, **kwargs), lambda: func(*args, **kwargs)
+            )
+
+        inner.caches = caches
+        return inner
+
+    return outer
+
+
+@cached()
+async def fetch_status(session: ClientSession, url: str) -> int:
+    async with session.get(url) as result:
+        return result.status
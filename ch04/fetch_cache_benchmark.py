@@ -0,0 +1,87 @@
+"""
+`calls` overlapping calls over `urls` distinct urls against `local_server.py`,
+with a plain `fetch` and with `fetch_cache`, then a check that cancelled
+callers don't cancel the shared request for the others.
+
+    python -m ch04.fetch_cache_benchmark --calls 5000 --urls 100
+"""
+import argparse
+import asyncio
+import random
+from time import perf_counter
+
+from aiohttp import ClientSession
+
+from ch04.bounded_fetch import fetch
+from ch04.fetch_cache import FetchCache
+from ch04.local_server import make_url, start_server
+
+
+async def run(name: str, calls: int, urls: int, cache: FetchCache = None):
+    sent = 0
+
+    async def request(url: str) -> int:
+        nonlocal sent
+        sent += 1
+        return await fetch(session, url)
+
+    async def call(url: str) -> int:
+        # the callers don't all arrive at once
+        await asyncio.sleep(random.uniform(0, 0.5))
+        if cache is None:
+            return await request(url)
+        return await cache.get(url, lambda: request(url))
+
+    async with ClientSession() as session:
+        start = perf_counter()
+        await asyncio.gather(
+            *[
+                call(make_url(str(random.randrange(urls)), delay=0.05))
+                for _ in range(calls)
+            ]
+        )
+        seconds = perf_counter() - start
+    print(f"{name:<10} {seconds:>7.2f}s {sent:>14}")
+    if cache is not None:
+        print(f"Cache: {cache.snapshot()}")
+
+
+async def cancelled_waiters() -> None:
+    cache = FetchCache()
+    async with ClientSession() as session:
+        url = make_url("shared", delay=0.5)
+        callers = [
+            asyncio.create_task(cache.get(url, lambda: fetch(session, url)))
+            for _ in range(10)
+        ]
+        await asyncio.sleep(0.1)
+        for caller in callers[:5]:
+            caller.cancel()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+    cancelled = sum(
+        isinstance(result, asyncio.CancelledError) for result in results
+    )
+    print(
+        f"{cancelled} callers cancelled, the others got: {results[5:]},"
+        f" cache: {cache.snapshot()}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--urls", type=int, default=100)
+    args = parser.parse_args()
+
+    server = start_server()
+    try:
+        print(f"{'':<10} {'seconds':>8} {'requests sent':>14}")
+        asyncio.run(run("no cache", args.calls, args.urls))
+        asyncio.run(run("cached", args.calls, args.urls, FetchCache()))
+        asyncio.run(cancelled_waiters())
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,16 @@
 `asyncio.gather` allows us to run a lot of
 co-routines concurrently without explicit create a task for each
 co-routine.
+
+`main` asks for every url twice through the cached `fetch_cache.fetch_status`,
+the overlapping calls for the same url share one request.
 """
 
 import asyncio
 
 from aiohttp import ClientSession
 
+from ch04.fetch_cache import fetch_status
 from tools import async_timed
 
 
@@ -21,9 +25,10 @@ async def fetch(session: ClientSession, url: str) -> int:
 async def main():
     async with ClientSession() as session:
         urls = ["https://google.com", "https://bbc.com", "http://python.org"]
-        requests = [fetch(session=session, url=url) for url in urls]
+        requests = [fetch_status(session=session, url=url) for url in urls * 2]
         status_codes = await asyncio.gather(*requests)
         print(status_codes)
+        print(f"Cache: {fetch_status.caches[session].snapshot()}")
 
 
 @async_timed()
@@ -1,18 +1,47 @@
 """
-`asyncio.gather` allows us to run a lot of
+`asyncio.gather` allows us to run a lot of requests concurrently,
+with `return_exceptions=True` the failed ones come back as exceptions
+in the results instead of failing the whole `gather`.
+
+With `circuit_breaker.fetch` a host that keeps failing gets its breaker
+opened, and its next requests fail at once with `CircuitOpenError`
+instead of waiting out another failure.
 """
 
 import asyncio
+from collections import defaultdict
+from typing import Dict, List, Tuple
 
 from aiohttp import ClientSession
 
+from ch04 import circuit_breaker
+from ch04.circuit_breaker import CircuitBreaker, CircuitOpenError
+
 
-async def fetch(session: ClientSession, url: str) -> int:
-    async with session.get(url) as result:
-        return result.status
+def split_results(results: List) -> Tuple[List, List, List]:
+    """
+    Split the results of `gather(..., return_exceptions=True)`
+    into successful results, short-circuited failures and other exceptions
+    """
+    successful_results = [
+        res for res in results if not isinstance(res, Exception)
+    ]
+    short_circuited = [
+        res for res in results if isinstance(res, CircuitOpenError)
+    ]
+    exceptions = [
+        res
+        for res in results
+        if isinstance(res, Exception) and not isinstance(res, CircuitOpenError)
+    ]
+    return successful_results, short_circuited, exceptions
 
 
 async def main():
+    # opens after two failures, so the third round is short-circuited
+    breakers: Dict[str, CircuitBreaker] = defaultdict(
+        lambda: CircuitBreaker(min_requests=2)
+    )
     async with ClientSession() as session:
         urls = [
             "https://google.com",
@@ -20,14 +49,17 @@ async def main():
             "http://python.org",
             "http://mywebsitet.org",
         ]
-        requests = [fetch(session=session, url=url) for url in urls]
-        results = await asyncio.gather(*requests, return_exceptions=True)
-        exceptions = [res for res in results if isinstance(res, Exception)]
-        successful_results = [
-            res for res in results if not isinstance(res, Exception)
-        ]
-        print(f"Exceptions: {exceptions}")
-        print(f"Results: {successful_results}")
+        for _ in range(3):
+            requests = [
+                circuit_breaker.fetch(session, url, breakers) for url in urls
+            ]
+            results = await asyncio.gather(*requests, return_exceptions=True)
+            successful_results, short_circuited, exceptions = split_results(
+                results
+            )
+            print(f"Exceptions: {exceptions}")
+            print(f"Short-circuited: {short_circuited}")
+            print(f"Results: {successful_results}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+"""
+Hedged requests: if a request hasn't answered after `hedge_after` seconds,
+we send the same request once more and keep whichever answers first,
+the other one is cancelled.
+It's the `FIRST_COMPLETED` race of `wait_demo.main_first_complete`,
+but the second request starts only when the first one is already slow,
+so we pay a few extra requests to cut the tail latency.
+
+`hedge_after` is either a fixed delay or a percentile of the latencies
+of the last minute, e.g. `"p95"`. The latency of a hedged call is the
+time the caller waited, from the start of the first request to the first
+answer, whichever request gave it.
+To keep a slow server from doubling our traffic, hedges are capped
+at `max_hedge_ratio` of all the requests.
+"""
+import asyncio
+from time import perf_counter_ns
+from typing import Dict, Optional, Set, Union
+
+from aiohttp import ClientSession
+
+from ch04.bounded_fetch import fetch
+from metrics import WindowedHistogram
+
+HedgeAfter = Union[float, str]
+
+
+class HedgePolicy:
+    def __init__(
+        self,
+        hedge_after: HedgeAfter = "p95",
+        max_hedge_ratio: float = 0.1,
+        min_samples: int = 20,
+    ):
+        self.hedge_after = hedge_after
+        self.max_hedge_ratio = max_hedge_ratio
+        # don't trust a percentile of a handful of requests
+        self.min_samples = min_samples
+        self.latencies = WindowedHistogram()
+        self.requests = 0
+        self.hedges = 0
+
+    def can_hedge(self) -> bool:
+        return self.hedges < self.max_hedge_ratio * self.requests
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Seconds to wait before hedging, `None` to not hedge this request
+        """
+        if not self.can_hedge():
+            return None
+        if not isinstance(self.hedge_after, str):
+            return self.hedge_after
+        if self.latencies.count < self.min_samples:
+            return None
+        percent = float(self.hedge_after.lstrip("p"))
+        return self.latencies.percentile(percent) / 1e9
+
+
+policies: Dict[HedgeAfter, HedgePolicy] = {}
+
+
+async def hedged_fetch(
+    session: ClientSession,
+    url: str,
+    hedge_after: HedgeAfter = "p95",
+    policy: Optional[HedgePolicy] = None,
+) -> int:
+    """
+    `fetch` with one hedge, the calls with the same `hedge_after` share
+    one `HedgePolicy` unless we pass our own
+    """
+    if policy is None:
+        policy = policies.setdefault(hedge_after, HedgePolicy(hedge_after))
+    policy.requests += 1
+    start = perf_counter_ns()
+    pending: Set[asyncio.Task] = {asyncio.create_task(fetch(session, url))}
+    try:
+        delay = policy.hedge_delay()
+        if delay is not None:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            # during a slowdown all the requests in flight get here at
+            # once, check the cap again so that only the first ones hedge
+            if not done and policy.can_hedge():
+                policy.hedges += 1
+                pending.add(asyncio.create_task(fetch(session, url)))
+        while True:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for done_task in done:
+                if done_task.exception() is None:
+                    policy.latencies.record(perf_counter_ns() - start)
+                    return done_task.result()
+            if not pending:
+                # every request failed
+                return done_task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def main():
+    async with ClientSession() as session:
+        url = "https://www.python.org"
+        for _ in range(30):
+            status = await hedged_fetch(session, url, hedge_after="p90")
+            print(f"Status code from: {url} is: {status}")
+        policy = policies["p90"]
+        print(f"Requests: {policy.requests}, hedges: {policy.hedges}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
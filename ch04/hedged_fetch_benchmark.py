@@ -0,0 +1,83 @@
+"""
+Latency percentiles of plain and hedged requests against `local_server.py`,
+where one request out of twenty takes `outlier_delay` instead of `delay`.
+
+    python -m ch04.hedged_fetch_benchmark --requests 2000
+"""
+import argparse
+import asyncio
+from time import perf_counter_ns
+from typing import Callable
+
+from aiohttp import ClientSession
+
+from ch03.cancelling_tasks.engine_benchmark import percentile
+from ch04.bounded_fetch import fetch
+from ch04.hedged_fetch import HedgePolicy, hedged_fetch
+from ch04.local_server import make_url, start_server
+
+
+async def run(request: Callable, requests: int, concurrency: int, url: str):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def timed(session: ClientSession) -> None:
+        async with semaphore:
+            start = perf_counter_ns()
+            await request(session, url)
+            latencies.append(perf_counter_ns() - start)
+
+    async with ClientSession() as session:
+        await asyncio.gather(*[timed(session) for _ in range(requests)])
+    return sorted(latencies)
+
+
+async def benchmark(args: argparse.Namespace) -> None:
+    url = make_url(
+        delay=args.delay, outlier_rate=0.05, outlier_delay=args.outlier_delay
+    )
+    fixed = HedgePolicy(hedge_after=args.hedge_after)
+    observed = HedgePolicy(hedge_after="p95")
+    modes = {
+        "plain": (fetch, None),
+        f"hedge {args.hedge_after}s": (
+            lambda session, url: hedged_fetch(session, url, policy=fixed),
+            fixed,
+        ),
+        "hedge p95": (
+            lambda session, url: hedged_fetch(session, url, policy=observed),
+            observed,
+        ),
+    }
+    print(
+        f"{'mode':<12} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        f" {'extra requests':>15}"
+    )
+    for mode, (request, policy) in modes.items():
+        latencies = await run(request, args.requests, args.concurrency, url)
+        extra = policy.hedges / policy.requests if policy else 0
+        print(
+            f"{mode:<12} {percentile(latencies, 50) / 1e6:>8.1f}"
+            f" {percentile(latencies, 99) / 1e6:>8.1f}"
+            f" {percentile(latencies, 100) / 1e6:>8.1f} {extra:>15.1%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.01)
+    parser.add_argument("--outlier-delay", type=float, default=0.5)
+    parser.add_argument("--hedge-after", type=float, default=0.1)
+    args = parser.parse_args()
+
+    server = start_server()
+    try:
+        asyncio.run(benchmark(args))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
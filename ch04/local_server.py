@@ -0,0 +1,73 @@
+"""
+A local `aiohttp` server for the `ch04` benchmarks, so they don't hit real sites.
+
+`GET /<anything>?delay=0.5&status=503` answers with `status`
+after sleeping for `delay` seconds.
+With `outlier_rate=0.05&outlier_delay=1` one request out of twenty,
+picked at random, sleeps for `outlier_delay` seconds instead.
+"""
+import asyncio
+import multiprocessing
+import random
+import socket
+import time
+
+from aiohttp import web
+
+ADDRESS = ("127.0.0.1", 8080)
+
+
+async def handle(request: web.Request) -> web.Response:
+    delay = float(request.query.get("delay", 0))
+    if random.random() < float(request.query.get("outlier_rate", 0)):
+        delay = float(request.query["outlier_delay"])
+    if delay:
+        await asyncio.sleep(delay)
+    return web.Response(text="ok", status=int(request.query.get("status", 200)))
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handle)
+    return app
+
+
+def run_server(address: tuple = ADDRESS) -> None:
+    web.run_app(
+        create_app(),
+        host=address[0],
+        port=address[1],
+        print=None,
+        access_log=None,
+    )
+
+
+def start_server(address: tuple = ADDRESS) -> multiprocessing.Process:
+    """
+    Run the server in another process and wait until it accepts connections
+    """
+    server = multiprocessing.Process(
+        target=run_server, args=(address,), daemon=True
+    )
+    server.start()
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(address).close()
+            return server
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                server.terminate()
+                raise
+            time.sleep(0.05)
+
+
+def make_url(path: str = "", address: tuple = ADDRESS, **query) -> str:
+    params = "&".join(f"{key}={value}" for key, value in query.items())
+    return f"http://{address[0]}:{address[1]}/{path}" + (
+        f"?{params}" if params else ""
+    )
+
+
+if __name__ == "__main__":
+    run_server()
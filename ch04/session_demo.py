@@ -6,6 +6,7 @@ import asyncio
 import aiohttp
 from aiohttp import ClientSession
 
+from ch04.session_factory import sessions
 from tools import async_timed
 
 
@@ -26,5 +27,23 @@ async def main():
         print(f"Status code from: {url} is: {status}")
 
 
+@async_timed()
+async def main_pooled():
+    """
+    The shared session of `session_factory`, with its connections
+    to the host already open before the first request
+    """
+    url = "https://www.google.com"
+    await sessions.prewarm([url], connections=2)
+    try:
+        for _ in range(3):
+            status = await fetch_status(session=sessions.get(), url=url)
+            print(f"Status code from: {url} is: {status}")
+        print(f"Connection pool: {sessions.snapshot()}")
+    finally:
+        await sessions.close()
+
+
 if __name__ == "__main__":
     asyncio.run(main())
+    asyncio.run(main_pooled())
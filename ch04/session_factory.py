@@ -0,0 +1,132 @@
+"""
+One tuned `ClientSession` shared by all our requests,
+instead of a default session per `main()`.
+
+The `TCPConnector` of the session is the connection pool:
+- `limit` / `limit_per_host`: how many connections in total / per host,
+  a request that finds no free slot waits for one
+- `keepalive_timeout`: how long an idle connection stays in the pool
+- `ttl_dns_cache`: how long we reuse a DNS lookup
+We can also open connections to the hosts we know we'll need up front
+(pre-warming), so the first requests skip the TCP and TLS handshakes.
+"""
+import asyncio
+from typing import Dict, Iterable, Optional
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, TraceConfig
+
+
+class ConnectorStats:
+    """
+    Counts the connections the session created and reused and
+    the time requests waited for a free slot, through aiohttp's tracing
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.reused = 0
+        self.queued = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def trace_config(self) -> TraceConfig:
+        trace_config = TraceConfig()
+        trace_config.on_connection_create_end.append(self.on_created)
+        trace_config.on_connection_reuseconn.append(self.on_reused)
+        trace_config.on_connection_queued_start.append(self.on_queued_start)
+        trace_config.on_connection_queued_end.append(self.on_queued_end)
+        return trace_config
+
+    async def on_created(self, session, context, params) -> None:
+        self.created += 1
+
+    async def on_reused(self, session, context, params) -> None:
+        self.reused += 1
+
+    async def on_queued_start(self, session, context, params) -> None:
+        context.queued_at = asyncio.get_running_loop().time()
+
+    async def on_queued_end(self, session, context, params) -> None:
+        wait = asyncio.get_running_loop().time() - context.queued_at
+        self.queued += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+
+class SessionFactory:
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 15,
+        ttl_dns_cache: Optional[int] = 10,
+        timeout: Optional[ClientTimeout] = None,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.timeout = timeout
+        self.stats = ConnectorStats()
+        self.session: Optional[ClientSession] = None
+
+    def get(self) -> ClientSession:
+        """
+        The shared session, created on the first call
+        (it needs a running event loop)
+        """
+        if self.session is None or self.session.closed:
+            connector = TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache,
+            )
+            kwargs = {} if self.timeout is None else {"timeout": self.timeout}
+            self.session = ClientSession(
+                connector=connector,
+                trace_configs=[self.stats.trace_config()],
+                **kwargs,
+            )
+        return self.session
+
+    async def prewarm(self, urls: Iterable[str], connections: int = 1) -> None:
+        """
+        Open `connections` connections to the host of every url,
+        they stay idle in the pool for `keepalive_timeout` seconds
+        """
+        session = self.get()
+
+        async def touch(url: str) -> None:
+            async with session.head(url):
+                pass
+
+        await asyncio.gather(
+            *[touch(url) for url in urls for _ in range(connections)],
+            return_exceptions=True,
+        )
+
+    def snapshot(self) -> Dict[str, float]:
+        stats = {
+            "created": self.stats.created,
+            "reused": self.stats.reused,
+            "queued": self.stats.queued,
+            "wait_total_sec": self.stats.wait_total,
+            "wait_max_sec": self.stats.wait_max,
+        }
+        if self.session is not None and not self.session.closed:
+            # aiohttp has no public API for the state of the pool
+            connector = self.session.connector
+            stats["acquired"] = len(connector._acquired)
+            stats["idle"] = sum(
+                len(conns) for conns in connector._conns.values()
+            )
+            stats["open"] = stats["acquired"] + stats["idle"]
+        return stats
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+
+
+sessions = SessionFactory()
@@ -0,0 +1,66 @@
+"""
+A new `ClientSession` for every request compared with the shared session
+of `session_factory`, against `local_server.py`.
+
+    python -m ch04.session_factory_benchmark --requests 2000
+"""
+import argparse
+import asyncio
+from time import perf_counter
+from typing import Callable
+
+from aiohttp import ClientSession
+
+from ch04.bounded_fetch import fetch
+from ch04.local_server import make_url, start_server
+from ch04.session_factory import SessionFactory
+
+
+async def run(request: Callable, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i: int) -> None:
+        async with semaphore:
+            await request(make_url(str(i)))
+
+    start = perf_counter()
+    await asyncio.gather(*[limited(i) for i in range(requests)])
+    return requests / (perf_counter() - start)
+
+
+async def benchmark(args: argparse.Namespace) -> None:
+    async def per_request_session(url: str) -> None:
+        async with ClientSession() as session:
+            await fetch(session, url)
+
+    throughput = await run(per_request_session, args.requests, args.concurrency)
+    print(f"{'session per request':<22} {throughput:>8.0f} requests/sec")
+
+    factory = SessionFactory(limit=args.limit, limit_per_host=args.limit)
+    await factory.prewarm([make_url()], connections=args.limit)
+
+    async def pooled_session(url: str) -> None:
+        await fetch(factory.get(), url)
+
+    throughput = await run(pooled_session, args.requests, args.concurrency)
+    print(f"{'pooled session':<22} {throughput:>8.0f} requests/sec")
+    print(f"Connection pool: {factory.snapshot()}")
+    await factory.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    server = start_server()
+    try:
+        asyncio.run(benchmark(args))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+`deadline_as_completed.as_completed` against `local_server.py`:
+whatever way the iteration ends, no task is left behind.
+
+    python -m pytest ch04/test_deadline_as_completed.py
+"""
+import asyncio
+from contextlib import aclosing
+from typing import List
+
+from aiohttp import ClientSession
+
+from ch04.bounded_fetch import fetch
+from ch04.deadline_as_completed import as_completed
+from ch04.local_server import make_url, start_server
+
+
+def setup_module() -> None:
+    global server
+    server = start_server()
+
+
+def teardown_module() -> None:
+    server.terminate()
+
+
+def leftovers() -> List[asyncio.Task]:
+    return list(asyncio.all_tasks() - {asyncio.current_task()})
+
+
+async def sleep(seconds: float) -> float:
+    await asyncio.sleep(seconds)
+    return seconds
+
+
+async def collect(session: ClientSession, delays: List[float], **kwargs):
+    """
+    `(result or "timeout")` of every request, in completion order
+    """
+    results = []
+    requests = [
+        fetch(session, make_url(str(i), delay=delay))
+        for i, delay in enumerate(delays)
+    ]
+    async for done in as_completed(requests, **kwargs):
+        try:
+            results.append(await done)
+        except asyncio.TimeoutError:
+            results.append("timeout")
+    return results
+
+
+def test_task_timeout():
+    async def main():
+        async with ClientSession() as session:
+            results = await collect(session, [0, 0.1, 5], task_timeout=0.5)
+            assert results == [200, 200, "timeout"]
+            assert leftovers() == []
+
+    asyncio.run(main())
+
+
+def test_global_timeout():
+    async def main():
+        async with ClientSession() as session:
+            results = []
+            try:
+                results = await collect(session, [0, 5, 5], timeout=0.5)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                raise AssertionError(f"no TimeoutError, got {results}")
+            assert leftovers() == []
+
+    asyncio.run(main())
+
+
+def test_early_aclose():
+    async def main():
+        async with ClientSession() as session:
+            requests = [
+                fetch(session, make_url(str(i), delay=delay))
+                for i, delay in enumerate([0, 5, 5])
+            ]
+            async with aclosing(as_completed(requests)) as iterator:
+                async for done in iterator:
+                    assert await done == 200
+                    break
+            assert leftovers() == []
+
+    asyncio.run(main())
+
+
+def test_slow_consumer():
+    """
+    A task that finished within its deadline while the consumer was busy
+    is yielded with its result, not as a timeout
+    """
+
+    async def main():
+        results = []
+        async for done in as_completed({sleep(0.1): None, sleep(0.2): 0.3}):
+            try:
+                results.append(await done)
+            except asyncio.TimeoutError:
+                results.append("timeout")
+            await asyncio.sleep(0.5)
+        assert results == [0.1, 0.2]
+        assert leftovers() == []
+
+    asyncio.run(main())
+
+
+def test_slow_consumer_global_timeout():
+    """
+    The results that are in when the global timeout expires are yielded
+    before the `TimeoutError`
+    """
+
+    async def main():
+        results = []
+        try:
+            async for done in as_completed(
+                [sleep(0.1), sleep(0.2), sleep(5)], timeout=0.3
+            ):
+                results.append(await done)
+                await asyncio.sleep(0.5)
+        except asyncio.TimeoutError:
+            pass
+        assert results == [0.1, 0.2]
+        assert leftovers() == []
+
+    asyncio.run(main())
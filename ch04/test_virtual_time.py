@@ -0,0 +1,68 @@
+"""
+`virtual_time.VirtualTimeEventLoop` keeps the timing semantics of asyncio:
+the timeouts fire at the exact (virtual) times they would with the real
+clock, and the whole file runs in milliseconds.
+
+    python -m pytest ch04/test_virtual_time.py
+"""
+import asyncio
+import time
+
+import virtual_time
+from tools import delay
+
+
+def test_wait_for_times_out_and_cancels():
+    async def main():
+        loop = asyncio.get_running_loop()
+        task = asyncio.create_task(delay(2))
+        try:
+            await asyncio.wait_for(task, timeout=1)
+        except asyncio.TimeoutError:
+            assert loop.time() == 1.0
+        else:
+            raise AssertionError("wait_for didn't time out")
+        assert task.cancelled()
+
+    virtual_time.run(main())
+
+
+def test_shield_times_out_without_cancelling():
+    async def main():
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(1)
+        task = asyncio.create_task(delay(10))
+        try:
+            await asyncio.wait_for(asyncio.shield(task), 5)
+        except asyncio.TimeoutError:
+            assert loop.time() == 6.0
+        else:
+            raise AssertionError("wait_for didn't time out")
+        assert not task.cancelled()
+        assert await task == 10
+        assert loop.time() == 11.0
+
+    virtual_time.run(main())
+
+
+def test_as_completed_order_and_timeout():
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        events = []
+        for done in asyncio.as_completed(
+            [delay(3), delay(1), delay(15)], timeout=11
+        ):
+            try:
+                events.append((await done, loop.time() - start))
+            except asyncio.TimeoutError:
+                events.append(("timeout", loop.time() - start))
+        assert events == [(1, 1.0), (3, 3.0), ("timeout", 11.0)]
+
+    virtual_time.run(main())
+
+
+def test_runs_in_milliseconds():
+    start = time.perf_counter()
+    virtual_time.run(asyncio.sleep(3600))
+    assert time.perf_counter() - start < 0.5
@@ -0,0 +1,84 @@
+"""
+A timeout storm: `requests` slow requests that all miss their deadline,
+followed by a batch of fast requests on the same session.
+
+With `asyncio.as_completed` the timed out requests keep their connections
+until the server answers, so the fast batch waits for free slots in the
+connection pool. With `deadline_as_completed.as_completed` they are
+cancelled and their connections are back in the pool right away.
+
+    python -m ch04.timeout_storm_demo
+"""
+import asyncio
+from time import perf_counter
+
+from aiohttp import ClientSession, TCPConnector
+
+from ch04 import deadline_as_completed
+from ch04.bounded_fetch import fetch
+from ch04.local_server import make_url, start_server
+
+
+async def with_asyncio(session: ClientSession, requests: int, slow: float):
+    tasks = [
+        fetch(session=session, url=make_url(str(i), delay=slow))
+        for i in range(requests)
+    ]
+    for done_task in asyncio.as_completed(tasks, timeout=0.5):
+        try:
+            await done_task
+        except asyncio.TimeoutError:
+            pass
+
+
+async def with_deadlines(session: ClientSession, requests: int, slow: float):
+    tasks = [
+        fetch(session=session, url=make_url(str(i), delay=slow))
+        for i in range(requests)
+    ]
+    async for done_task in deadline_as_completed.as_completed(
+        tasks, task_timeout=0.5
+    ):
+        try:
+            await done_task
+        except asyncio.TimeoutError:
+            pass
+
+
+async def storm(mode, requests: int = 200, slow: float = 3, fast: int = 100):
+    connector = TCPConnector(limit=100)
+    async with ClientSession(connector=connector) as session:
+        start = perf_counter()
+        await mode(session, requests, slow)
+        storm_time = perf_counter() - start
+        # everything but this task is a leftover of the storm
+        leaked = len(asyncio.all_tasks()) - 1
+
+        start = perf_counter()
+        await asyncio.gather(
+            *[fetch(session=session, url=make_url(str(i))) for i in range(fast)]
+        )
+        fast_time = perf_counter() - start
+        print(
+            f"{mode.__name__:<16} storm: {storm_time:6.2f}s"
+            f"  leaked tasks: {leaked:4}"
+            f"  {fast} fast requests after it: {fast_time:6.2f}s"
+        )
+        # let the leftovers finish before closing the session
+        await asyncio.gather(
+            *(asyncio.all_tasks() - {asyncio.current_task()}),
+            return_exceptions=True,
+        )
+
+
+def main() -> None:
+    server = start_server()
+    try:
+        asyncio.run(storm(with_asyncio))
+        asyncio.run(storm(with_deadlines))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
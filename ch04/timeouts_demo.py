@@ -1,13 +1,19 @@
 """
 `aiohttp` timeout demo.
+
+The session comes from a `session_factory.SessionFactory` with the
+session-wide timeout, the request timeout of `fetch_status` overrides it.
 """
 import asyncio
 
 import aiohttp
 from aiohttp import ClientSession
 
+from ch04.session_factory import SessionFactory
 from tools import async_timed
 
+sessions = SessionFactory(timeout=aiohttp.ClientTimeout(total=1, connect=0.1))
+
 
 @async_timed()
 async def fetch_status(session: ClientSession, url: str) -> int:
@@ -21,11 +27,12 @@ async def fetch_status(session: ClientSession, url: str) -> int:
 
 @async_timed()
 async def main():
-    session_timeout = aiohttp.ClientTimeout(total=1, connect=0.1)
-    async with aiohttp.ClientSession(timeout=session_timeout) as session:
-        url = "https://www.google.com"
-        status = await fetch_status(session=session, url=url)
+    url = "https://www.google.com"
+    try:
+        status = await fetch_status(session=sessions.get(), url=url)
         print(f"Status code from: {url} is: {status}")
+    finally:
+        await sessions.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,208 @@
+"""
+A generic async connection pool, like `asyncpg.create_pool`.
+
+The pool doesn't know what a connection is, it gets a `connect()` coroutine
+that opens one and the connections only need a `close()` coroutine:
+- between `min_size` and `max_size` connections, the idle ones above
+  `min_size` are closed after `max_idle` seconds
+- `acquire()` waits at most `acquire_timeout` seconds for a connection,
+  then raises `PoolTimeoutError`
+- with a `health_check(connection)` coroutine, a connection idle for more
+  than `health_check_after` seconds is checked before we hand it out,
+  a broken one is closed and replaced
+
+    async with pool.acquire() as connection:
+        await connection.fetch(query)
+
+`pool.cursor(...)` streams the rows of a query, holding one connection
+for as long as we iterate. If we stop early we should close it
+with `contextlib.aclosing`, so the connection goes back to the pool
+right away instead of when the generator is garbage collected.
+"""
+import asyncio
+import contextlib
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable],
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 5,
+        max_idle: float = 60,
+        health_check: Optional[Callable[..., Awaitable[bool]]] = None,
+        health_check_after: float = 1,
+    ):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_idle = max_idle
+        self.health_check = health_check
+        self.health_check_after = health_check_after
+        # (connection, released at), the most recently used last
+        self.idle: Deque = deque()
+        self.in_use = 0
+        # a slot for every connection we hand out or are opening
+        self.slots = asyncio.Semaphore(max_size)
+        self.reaper: Optional[asyncio.Task] = None
+        self.is_closed = False
+        self.waiting = 0
+        self.acquired = 0
+        self.created = 0
+        self.closed = 0
+        self.unhealthy = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+
+    async def start(self) -> "ConnectionPool":
+        connections = await asyncio.gather(
+            *[self.connect() for _ in range(self.min_size)]
+        )
+        self.created += len(connections)
+        now = time.monotonic()
+        self.idle.extend((connection, now) for connection in connections)
+        self.reaper = asyncio.create_task(self.evict_idle())
+        return self
+
+    async def __aenter__(self) -> "ConnectionPool":
+        return await self.start()
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    @property
+    def size(self) -> int:
+        return len(self.idle) + self.in_use
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> AsyncIterator:
+        connection = await self.get()
+        try:
+            yield connection
+        finally:
+            await self.release(connection)
+
+    async def get(self):
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise PoolTimeoutError(
+                f"No connection after {self.acquire_timeout} sec(s)"
+            ) from None
+        finally:
+            self.waiting -= 1
+        self.wait_total += time.monotonic() - start
+        try:
+            connection = await self.checkout()
+        except BaseException:
+            self.slots.release()
+            raise
+        self.in_use += 1
+        self.acquired += 1
+        return connection
+
+    async def checkout(self):
+        """
+        The most recently used healthy idle connection, or a new one
+        """
+        while self.idle:
+            connection, released_at = self.idle.pop()
+            idle = time.monotonic() - released_at
+            if self.health_check is None or idle < self.health_check_after:
+                return connection
+            try:
+                healthy = await self.health_check(connection)
+            except asyncio.CancelledError:
+                self.idle.append((connection, released_at))
+                raise
+            except Exception:
+                healthy = False
+            if healthy:
+                return connection
+            self.unhealthy += 1
+            await self.discard(connection)
+        connection = await self.connect()
+        self.created += 1
+        return connection
+
+    async def release(self, connection) -> None:
+        self.in_use -= 1
+        self.slots.release()
+        if self.is_closed:
+            await self.discard(connection)
+        else:
+            self.idle.append((connection, time.monotonic()))
+
+    async def discard(self, connection) -> None:
+        self.closed += 1
+        try:
+            await connection.close()
+        except Exception:
+            pass
+
+    async def evict_idle(self) -> None:
+        """
+        Close the connections idle for longer than `max_idle`,
+        as long as we keep `min_size` of them
+        """
+        while True:
+            await asyncio.sleep(self.max_idle / 2)
+            deadline = time.monotonic() - self.max_idle
+            # the least recently used are first
+            while (
+                self.idle
+                and self.size > self.min_size
+                and self.idle[0][1] < deadline
+            ):
+                connection, _ = self.idle.popleft()
+                await self.discard(connection)
+
+    async def cursor(
+        self, query: str, *params, fetch_size: int = 100
+    ) -> AsyncIterator:
+        """
+        Stream the rows of `query`, fetched `fetch_size` at a time
+        """
+        async with self.acquire() as connection:
+            async for row in connection.cursor(
+                query, *params, fetch_size=fetch_size
+            ):
+                yield row
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "size": self.size,
+            "idle": len(self.idle),
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "created": self.created,
+            "closed": self.closed,
+            "unhealthy": self.unhealthy,
+            "timeouts": self.timeouts,
+            "wait_total_sec": self.wait_total,
+        }
+
+    async def close(self) -> None:
+        """
+        Close the idle connections, the ones in use are closed
+        when they are released
+        """
+        self.is_closed = True
+        if self.reaper is not None:
+            self.reaper.cancel()
+        while self.idle:
+            connection, _ = self.idle.pop()
+            await self.discard(connection)
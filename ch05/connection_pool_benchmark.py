@@ -0,0 +1,119 @@
+"""
+Concurrent queries against `sqlite_connection.py` through
+`connection_pool.ConnectionPool`, for several pool sizes,
+then the memory of streaming a big result set with `pool.cursor`
+compared with `fetch`.
+
+    python -m ch05.connection_pool_benchmark --queries 200 --latency 0.005
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import tempfile
+import tracemalloc
+from functools import partial
+from time import perf_counter
+
+from ch05.connection_pool import ConnectionPool
+from ch05.sqlite_connection import SQLiteConnection, connect
+
+QUERY = "SELECT name, price FROM product WHERE id BETWEEN ? AND ? + 100"
+
+
+async def create_products(path: str, products: int) -> None:
+    connection = await connect(path)
+    await connection.execute(
+        "CREATE TABLE product (id INTEGER PRIMARY KEY, name TEXT, price REAL)"
+    )
+    await connection.executemany(
+        "INSERT INTO product (name, price) VALUES (?, ?)",
+        [(f"product {i}", random.uniform(1, 100)) for i in range(products)],
+    )
+    await connection.close()
+
+
+async def run_queries(
+    path: str, products: int, pool_size: int, queries: int, latency: float
+) -> None:
+    async with ConnectionPool(
+        partial(connect, path, latency),
+        min_size=pool_size,
+        max_size=pool_size,
+        acquire_timeout=60,
+        health_check=SQLiteConnection.ping,
+    ) as pool:
+
+        async def query() -> None:
+            async with pool.acquire() as connection:
+                first = random.randrange(products)
+                await connection.fetch(QUERY, first, first)
+
+        start = perf_counter()
+        await asyncio.gather(*[query() for _ in range(queries)])
+        seconds = perf_counter() - start
+        stats = pool.stats()
+    print(
+        f"{pool_size:>9} {queries / seconds:>12.0f}"
+        f" {stats['wait_total_sec'] / queries * 1000:>12.2f}"
+        f" {stats['created']:>8}"
+    )
+
+
+async def stream(path: str, fetch_size: int) -> None:
+    async with ConnectionPool(partial(connect, path)) as pool:
+        tracemalloc.start()
+        async with pool.acquire() as connection:
+            rows = await connection.fetch("SELECT * FROM product")
+        _, fetch_peak = tracemalloc.get_traced_memory()
+        del rows
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        count = 0
+        async with contextlib.aclosing(
+            pool.cursor("SELECT * FROM product", fetch_size=fetch_size)
+        ) as rows:
+            async for _ in rows:
+                count += 1
+        _, cursor_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(
+        f"{count} rows, peak memory: fetch {fetch_peak / 2**20:.1f} MiB,"
+        f" cursor (fetch_size={fetch_size}) {cursor_peak / 2**20:.1f} MiB"
+    )
+
+
+async def benchmark(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "products.db")
+        await create_products(path, args.products)
+        print(
+            f"{args.queries} concurrent queries,"
+            f" {args.latency * 1000:.0f}ms round trip"
+        )
+        print(
+            f"{'pool size':>9} {'queries/sec':>12} {'mean wait ms':>12} {'created':>8}"
+        )
+        for pool_size in args.pool_sizes:
+            await run_queries(
+                path, args.products, pool_size, args.queries, args.latency
+            )
+        await stream(path, args.fetch_size)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--fetch-size", type=int, default=500)
+    parser.add_argument(
+        "--pool-sizes", type=int, nargs="+", default=[1, 2, 5, 10, 20]
+    )
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
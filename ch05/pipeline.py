@@ -0,0 +1,201 @@
+"""
+Async generator stages we can chain into a pipeline.
+
+With a plain `async for` the consumer pulls one item at a time: while it
+works on an item the producer waits, and while the producer makes the next
+one the consumer waits. Here the stages run concurrently and are connected
+through bounded `asyncio.Queue`s, so a slow producer overlaps with a slow
+consumer, and when the consumer falls behind the queues fill up and the
+producer waits (backpressure) instead of piling up items in memory.
+
+- `aprefetch(buffer_size)`: pull up to `buffer_size` items ahead
+- `abatch(n, max_wait)`: lists of `n` items, or less if the first item of
+  the batch waited for `max_wait` seconds
+- `amap(fn, concurrency, ordered)`: `await fn(item)` for up to `concurrency`
+  items at once, in the order of the items or in the order they complete
+- `amerge(*sources)`: the items of all the sources as they come
+
+    async for batch in pipeline(source, amap(fetch, 10), abatch(100, 0.5)):
+        ...
+
+A stage stops the stages before it when it's closed, so if we break out
+early we should close the pipeline with `contextlib.aclosing`.
+"""
+import asyncio
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    List,
+    Set,
+)
+
+Stage = Callable[[AsyncIterable], AsyncIterator]
+
+# marks the end of a source in a queue
+DONE = object()
+
+
+class Failure:
+    """
+    An exception of a source, raised again by the stage reading the queue
+    """
+
+    def __init__(self, exception: Exception):
+        self.exception = exception
+
+
+async def feed(source: AsyncIterable, queue: asyncio.Queue) -> None:
+    """
+    Put the items of `source` in `queue`, followed by `DONE`
+    """
+    try:
+        async for item in source:
+            await queue.put(item)
+    except Exception as ex:
+        await queue.put(Failure(ex))
+        return
+    finally:
+        if hasattr(source, "aclose"):
+            await source.aclose()
+    await queue.put(DONE)
+
+
+def unwrap(item: Any) -> Any:
+    if isinstance(item, Failure):
+        raise item.exception
+    return item
+
+
+async def stop(tasks: Set[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def aprefetch(buffer_size: int) -> Stage:
+    async def stage(source: AsyncIterable) -> AsyncIterator:
+        queue = asyncio.Queue(buffer_size)
+        feeder = asyncio.create_task(feed(source, queue))
+        try:
+            while (item := await queue.get()) is not DONE:
+                yield unwrap(item)
+        finally:
+            await stop({feeder})
+
+    return stage
+
+
+def abatch(n: int, max_wait: float) -> Stage:
+    async def stage(source: AsyncIterable) -> AsyncIterator[List]:
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(n)
+        feeder = asyncio.create_task(feed(source, queue))
+        try:
+            done = False
+            while not done:
+                item = await queue.get()
+                if item is DONE:
+                    break
+                batch = [unwrap(item)]
+                deadline = loop.time() + max_wait
+                while len(batch) < n:
+                    try:
+                        if queue.empty():
+                            item = await asyncio.wait_for(
+                                queue.get(), deadline - loop.time()
+                            )
+                        else:
+                            item = queue.get_nowait()
+                    except asyncio.TimeoutError:
+                        break
+                    if item is DONE:
+                        done = True
+                        break
+                    batch.append(unwrap(item))
+                yield batch
+        finally:
+            await stop({feeder})
+
+    return stage
+
+
+def amap(
+    fn: Callable[[Any], Awaitable],
+    concurrency: int,
+    ordered: bool = True,
+) -> Stage:
+    async def ordered_stage(source: AsyncIterable) -> AsyncIterator:
+        items = aiter(source)
+        pending: Deque[asyncio.Task] = deque()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < concurrency:
+                    try:
+                        item = await anext(items)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending.append(asyncio.create_task(fn(item)))
+                if not pending:
+                    break
+                yield await pending.popleft()
+        finally:
+            await stop(set(pending))
+            if hasattr(items, "aclose"):
+                await items.aclose()
+
+    async def unordered_stage(source: AsyncIterable) -> AsyncIterator:
+        items = aiter(source)
+        running: Set[asyncio.Task] = set()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(running) < concurrency:
+                    try:
+                        item = await anext(items)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    running.add(asyncio.create_task(fn(item)))
+                if not running:
+                    break
+                done, running = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            await stop(running)
+            if hasattr(items, "aclose"):
+                await items.aclose()
+
+    return ordered_stage if ordered else unordered_stage
+
+
+async def amerge(
+    *sources: AsyncIterable, buffer_size: int = 1
+) -> AsyncIterator:
+    queue = asyncio.Queue(buffer_size)
+    feeders = {asyncio.create_task(feed(source, queue)) for source in sources}
+    try:
+        remaining = len(sources)
+        while remaining:
+            item = await queue.get()
+            if item is DONE:
+                remaining -= 1
+            else:
+                yield unwrap(item)
+    finally:
+        await stop(feeders)
+
+
+def pipeline(source: AsyncIterable, *stages: Stage) -> AsyncIterator:
+    for stage in stages:
+        source = stage(source)
+    return source
@@ -0,0 +1,84 @@
+"""
+A produce -> transform -> consume pipeline with I/O-like delays,
+first with the plain `async for` of `async_generator.main`,
+then with the stages of `pipeline.py`.
+
+- produce: `produce_delay` seconds per item, like `generator_demo`
+- transform: `transform_delay` seconds per item, like a request
+- consume: `consume_delay` seconds per call, one call per item or per batch,
+  like a write to a database
+
+    python -m ch05.pipeline_benchmark --items 200
+"""
+import argparse
+import asyncio
+from time import perf_counter
+from typing import AsyncIterator, List
+
+from ch05.pipeline import abatch, amap, amerge, aprefetch, pipeline
+
+
+async def produce(items: range, delay: float) -> AsyncIterator[int]:
+    for number in items:
+        await asyncio.sleep(delay)
+        yield number
+
+
+async def sequential(args: argparse.Namespace) -> int:
+    consumed = 0
+    async for number in produce(range(args.items), args.produce_delay):
+        await asyncio.sleep(args.transform_delay)
+        await asyncio.sleep(args.consume_delay)
+        consumed += 1
+    return consumed
+
+
+async def staged(args: argparse.Namespace) -> int:
+    async def transform(number: int) -> int:
+        await asyncio.sleep(args.transform_delay)
+        return number
+
+    async def consume(batch: List[int]) -> None:
+        await asyncio.sleep(args.consume_delay)
+
+    # two producers with half of the items each
+    half = args.items // 2
+    source = amerge(
+        produce(range(half), args.produce_delay),
+        produce(range(half, args.items), args.produce_delay),
+    )
+    consumed = 0
+    async for batch in pipeline(
+        source,
+        aprefetch(args.buffer_size),
+        amap(transform, args.concurrency, ordered=False),
+        abatch(args.batch_size, max_wait=0.05),
+    ):
+        await consume(batch)
+        consumed += len(batch)
+    return consumed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--produce-delay", type=float, default=0.01)
+    parser.add_argument("--transform-delay", type=float, default=0.02)
+    parser.add_argument("--consume-delay", type=float, default=0.01)
+    parser.add_argument("--buffer-size", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, run in {"async for": sequential, "pipeline": staged}.items():
+        start = perf_counter()
+        consumed = asyncio.run(run(args))
+        seconds = perf_counter() - start
+        print(
+            f"{name:<10} {consumed} items in {seconds:.2f}s,"
+            f" {consumed / seconds:.0f} items/sec"
+        )
+
+
+if __name__ == "__main__":
+    main()
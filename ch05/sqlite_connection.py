@@ -0,0 +1,86 @@
+"""
+A local stand-in for `asyncpg` connections, to try `connection_pool.py`
+without a Postgres server.
+
+`sqlite3` is blocking, so every connection runs its calls in its own
+single thread executor: the calls of one connection run one after the
+other, like the queries on one socket, while different connections run
+in parallel (sqlite releases the GIL while it runs a query).
+SQLite has no network, `latency` adds a round trip to every call.
+"""
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, List, Optional
+
+
+class SQLiteConnection:
+    def __init__(self, path: str, latency: float = 0):
+        self.path = path
+        self.latency = latency
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.connection: Optional[sqlite3.Connection] = None
+
+    async def run(self, func, *args) -> Any:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def open(self) -> "SQLiteConnection":
+        self.connection = await self.run(
+            lambda: sqlite3.connect(self.path, check_same_thread=False)
+        )
+        return self
+
+    async def execute(self, query: str, *params) -> int:
+        def execute() -> int:
+            with self.connection:
+                return self.connection.execute(query, params).rowcount
+
+        return await self.run(execute)
+
+    async def executemany(self, query: str, rows: List[tuple]) -> None:
+        def executemany() -> None:
+            with self.connection:
+                self.connection.executemany(query, rows)
+
+        await self.run(executemany)
+
+    async def fetch(self, query: str, *params) -> List[tuple]:
+        return await self.run(
+            lambda: self.connection.execute(query, params).fetchall()
+        )
+
+    async def cursor(
+        self, query: str, *params, fetch_size: int = 100
+    ) -> AsyncIterator[tuple]:
+        """
+        Stream the rows of `query`, only `fetch_size` of them are in memory
+        """
+        cursor = await self.run(self.connection.execute, query, params)
+        try:
+            while rows := await self.run(cursor.fetchmany, fetch_size):
+                for row in rows:
+                    yield row
+        finally:
+            await self.run(cursor.close)
+
+    async def ping(self) -> bool:
+        """
+        The health check of the pool
+        """
+        try:
+            return await self.run(
+                lambda: self.connection.execute("SELECT 1").fetchone() == (1,)
+            )
+        except sqlite3.Error:
+            return False
+
+    async def close(self) -> None:
+        await self.run(self.connection.close)
+        self.executor.shutdown(wait=False)
+
+
+async def connect(path: str, latency: float = 0) -> SQLiteConnection:
+    return await SQLiteConnection(path, latency).open()
@@ -0,0 +1,212 @@
+"""
+Tell when something blocks the event loop.
+
+- lag: a heartbeat task sleeps for `interval` seconds and records how much
+  later than that it woke up, a blocked loop wakes it up late
+- slow callbacks: every callback the loop runs (a task step is one) is timed,
+  and a watchdog thread takes a stack sample of the loop's thread while
+  one runs for longer than `slow_threshold`, so we see where it's stuck,
+  not only which coroutine it was
+- the running tasks and the ready queue: how many tasks exist and
+  how many callbacks wait for their turn
+
+Start it inside any `asyncio.run`:
+
+    monitor = LoopMonitor()
+    monitor.start()
+    ...
+    print(monitor.snapshot())
+    monitor.stop()
+
+    python -m loop_monitor
+"""
+import asyncio
+import sys
+import threading
+import traceback
+from collections import deque
+from time import perf_counter_ns
+from typing import Deque, Dict, List, Optional, Tuple
+
+from metrics import Histogram
+
+
+class SlowCallback:
+    def __init__(self, description: str, duration_ns: int, stack: List[str]):
+        self.description = description
+        self.duration_ns = duration_ns
+        self.stack = stack
+
+    def __repr__(self) -> str:
+        return (
+            f"SlowCallback({self.description},"
+            f" {self.duration_ns / 1e6:.1f}ms)"
+        )
+
+
+def describe(handle: asyncio.Handle) -> str:
+    """
+    The task and coroutine a task step belongs to, or the callback
+    """
+    task = getattr(handle._callback, "__self__", None)
+    if isinstance(task, asyncio.Task):
+        return f"{task.get_name()} {task.get_coro().__qualname__}"
+    return repr(handle)
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval: float = 0.005,
+        slow_threshold: float = 0.05,
+        max_slow_callbacks: int = 100,
+        stack_depth: int = 10,
+    ):
+        self.interval = interval
+        self.slow_threshold_ns = int(slow_threshold * 1e9)
+        self.stack_depth = stack_depth
+        self.lag = Histogram()
+        self.callbacks = 0
+        self.slow_callbacks: Deque[SlowCallback] = deque(
+            maxlen=max_slow_callbacks
+        )
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: Optional[int] = None
+        self.heartbeat_task: Optional[asyncio.Task] = None
+        self.watchdog: Optional[threading.Thread] = None
+        self.stopped = threading.Event()
+        # the handle the loop is running and when it started
+        self.current: Optional[Tuple[asyncio.Handle, int]] = None
+        # the last stack sample and the `current` it was taken for
+        self.sample: Optional[
+            Tuple[Tuple[asyncio.Handle, int], List[str]]
+        ] = None
+        self.original_run = None
+
+    def start(self) -> None:
+        """
+        Start monitoring the running loop
+        """
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.stopped.clear()
+        self.heartbeat_task = self.loop.create_task(self.heartbeat())
+        self.watchdog = threading.Thread(target=self.watch, daemon=True)
+        self.watchdog.start()
+        # `Handle._run` is what the loop calls for every callback,
+        # it's plain python so we can wrap it (uvloop doesn't use it)
+        self.original_run = asyncio.Handle._run
+        original_run = self.original_run
+        monitor = self
+
+        def timed_run(handle: asyncio.Handle) -> None:
+            if handle._loop is not monitor.loop:
+                return original_run(handle)
+            start = perf_counter_ns()
+            current = monitor.current = (handle, start)
+            try:
+                return original_run(handle)
+            finally:
+                monitor.current = None
+                monitor.callbacks += 1
+                duration = perf_counter_ns() - start
+                if duration > monitor.slow_threshold_ns:
+                    monitor.record_slow(current, duration)
+
+        asyncio.Handle._run = timed_run
+
+    def stop(self) -> None:
+        if self.original_run is not None:
+            asyncio.Handle._run = self.original_run
+            self.original_run = None
+        self.stopped.set()
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+
+    async def heartbeat(self) -> None:
+        while True:
+            start = perf_counter_ns()
+            await asyncio.sleep(self.interval)
+            late = perf_counter_ns() - start - int(self.interval * 1e9)
+            self.lag.record(max(late, 0))
+
+    def watch(self) -> None:
+        """
+        Runs in the watchdog thread: takes one stack sample of the loop's
+        thread for each callback that runs for longer than the threshold
+        """
+        sampled = None
+        while not self.stopped.wait(self.slow_threshold_ns / 2e9):
+            current = self.current
+            if current is None or current is sampled:
+                continue
+            handle, start = current
+            if perf_counter_ns() - start < self.slow_threshold_ns:
+                continue
+            frame = sys._current_frames().get(self.loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame, limit=self.stack_depth)
+            # the callback may have finished while we were sampling, and it
+            # can still finish right after this check: the sample carries
+            # the callback it belongs to, so it's never given to another
+            if self.current is current:
+                self.sample = (current, stack)
+                sampled = current
+
+    def record_slow(
+        self, current: Tuple[asyncio.Handle, int], duration_ns: int
+    ) -> None:
+        sample, self.sample = self.sample, None
+        stack = sample[1] if sample is not None and sample[0] is current else []
+        handle, _ = current
+        self.slow_callbacks.append(
+            SlowCallback(describe(handle), duration_ns, stack)
+        )
+
+    def snapshot(self) -> Dict:
+        loop = self.loop
+        return {
+            "lag": self.lag.summary(),
+            "callbacks": self.callbacks,
+            "slow_callbacks": len(self.slow_callbacks),
+            "tasks": len(asyncio.all_tasks(loop)),
+            # asyncio has no public API for the ready queue
+            "ready": len(loop._ready),
+        }
+
+    def print_snapshot(self) -> None:
+        snapshot = self.snapshot()
+        lag = snapshot["lag"]
+        print(
+            f"lag p50: {lag['p50_ns'] / 1e6:.3f}ms"
+            f" p99: {lag['p99_ns'] / 1e6:.3f}ms"
+            f" max: {lag['max_ns'] / 1e6:.3f}ms,"
+            f" tasks: {snapshot['tasks']}, ready: {snapshot['ready']},"
+            f" callbacks: {snapshot['callbacks']},"
+            f" slow: {snapshot['slow_callbacks']}"
+        )
+        for slow in self.slow_callbacks:
+            print(f"{slow}")
+            print("".join(slow.stack), end="")
+
+
+async def main():
+    from ch02.coroutine_vs_tasks import blocking_say_morning, say_morning
+
+    monitor = LoopMonitor()
+    monitor.start()
+    await asyncio.gather(*[say_morning(1) for _ in range(100)])
+    monitor.print_snapshot()
+
+    async def blocked_morning():
+        await asyncio.sleep(0.1)
+        return blocking_say_morning(0.2)
+
+    await asyncio.gather(blocked_morning(), say_morning(1))
+    monitor.print_snapshot()
+    monitor.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,199 @@
+"""
+Latency histograms for `tools.async_timed(metrics=True)`.
+
+Every decorated coroutine records its duration in nanoseconds into a
+`Histogram` with a fixed number of log-scaled buckets (HDR style):
+each power of two is split into `SUB_BUCKETS` linear buckets,
+so recording is a couple of integer operations, memory doesn't grow with
+the number of calls and any percentile is within ~6% of the real value.
+
+    python -m metrics  # measure the per call overhead
+"""
+import asyncio
+from collections import deque
+from time import monotonic, perf_counter_ns
+from typing import Deque, Dict, List
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# enough buckets for any 64-bit value
+BUCKETS = (64 - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+
+
+def bucket_upper_bound(index: int) -> int:
+    """
+    The biggest value that `Histogram.record` puts in bucket `index`
+    """
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = index & (SUB_BUCKETS - 1)
+    return ((SUB_BUCKETS + mantissa + 1) << shift) - 1
+
+
+class Histogram:
+    def __init__(self):
+        self.counts: List[int] = [0] * BUCKETS
+        self.errors = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        # this runs on every call, so no function calls in here:
+        # values below 2 * SUB_BUCKETS get a bucket of their own,
+        # for the rest the bucket is their exponent plus
+        # the `SUB_BUCKET_BITS` bits after their highest bit
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        if shift <= 0:
+            self.counts[value] += 1
+        else:
+            self.counts[
+                ((shift + 1) << SUB_BUCKET_BITS)
+                + ((value >> shift) & (SUB_BUCKETS - 1))
+            ] += 1
+        if value > self.max:
+            self.max = value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def percentile(self, percent: float) -> int:
+        """
+        The upper bound of the bucket that holds the `percent` percentile
+        """
+        total = self.count
+        if not total:
+            return 0
+        wanted = percent / 100 * total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= wanted:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90),
+            "p99_ns": self.percentile(99),
+            "max_ns": self.max,
+        }
+
+
+class WindowedHistogram(Histogram):
+    """
+    A `Histogram` of the last `windows` intervals of `interval` seconds,
+    for decisions that must follow the current latencies: every value
+    is recorded in the histogram of its interval too, and when an interval
+    is over, the counts of the oldest one are taken out of the total
+    """
+
+    def __init__(self, interval: float = 10, windows: int = 6):
+        super().__init__()
+        self.interval = interval
+        self.max_windows = windows
+        self.windows: Deque[Histogram] = deque([Histogram()])
+        self.rotate_at = monotonic() + interval
+
+    def rotate(self) -> None:
+        now = monotonic()
+        if now < self.rotate_at:
+            return
+        # after a quiet period, some intervals had no values at all
+        missed = int((now - self.rotate_at) // self.interval) + 1
+        for _ in range(min(missed, self.max_windows)):
+            self.windows.append(Histogram())
+            if len(self.windows) > self.max_windows:
+                oldest = self.windows.popleft()
+                self.counts = [
+                    total - count
+                    for total, count in zip(self.counts, oldest.counts)
+                ]
+        self.max = max(window.max for window in self.windows)
+        self.rotate_at += missed * self.interval
+
+    def record(self, value: int) -> None:
+        self.rotate()
+        super().record(value)
+        self.windows[-1].record(value)
+
+    @property
+    def count(self) -> int:
+        self.rotate()
+        return sum(self.counts)
+
+
+histograms: Dict[str, Histogram] = {}
+
+
+def get_histogram(name: str) -> Histogram:
+    return histograms.setdefault(name, Histogram())
+
+
+def snapshot() -> Dict[str, Dict[str, int]]:
+    """
+    Summary of every histogram, by coroutine name
+    """
+    return {name: hist.summary() for name, hist in histograms.items()}
+
+
+def print_snapshot() -> None:
+    print(
+        f"{'coroutine':<40} {'count':>8} {'errors':>6}"
+        f" {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    )
+    for name, summary in snapshot().items():
+        print(
+            f"{name:<40} {summary['count']:>8} {summary['errors']:>6}"
+            f" {summary['p50_ns'] / 1e6:>9.3f} {summary['p90_ns'] / 1e6:>9.3f}"
+            f" {summary['p99_ns'] / 1e6:>9.3f} {summary['max_ns'] / 1e6:>9.3f}"
+        )
+
+
+async def report_metrics(interval: float = 10) -> None:
+    """
+    Print the snapshot every `interval` seconds,
+    run it with `asyncio.create_task(report_metrics())`
+    """
+    while True:
+        await asyncio.sleep(interval)
+        print_snapshot()
+
+
+async def measure_overhead(calls: int = 200_000) -> None:
+    """
+    Time a no-op coroutine on its own, wrapped in a coroutine that does
+    nothing else, and decorated, the difference between the last two
+    is the cost of the timing and the recording
+    """
+    # `tools` records into the `metrics` module, not into `__main__`
+    import metrics
+    from tools import async_timed
+
+    async def noop() -> None:
+        pass
+
+    async def wrapper(*args, **kwargs) -> None:
+        return await noop(*args, **kwargs)
+
+    timings = {}
+    for name, coro in {
+        "plain": noop,
+        "wrapper": wrapper,
+        "metrics": async_timed(metrics=True)(noop),
+    }.items():
+        start = perf_counter_ns()
+        for _ in range(calls):
+            await coro()
+        timings[name] = (perf_counter_ns() - start) / calls
+        print(f"{name:<8} {timings[name]:>8.0f} ns/call")
+    overhead = timings["metrics"] - timings["wrapper"]
+    print(f"timing and recording: {overhead:.0f} ns/call")
+    metrics.print_snapshot()
+
+
+if __name__ == "__main__":
+    asyncio.run(measure_overhead())
@@ -0,0 +1,211 @@
+"""
+Where does the time of a coroutine go: running on the CPU or waiting?
+
+`tools.async_timed` only tells us the wall clock time of a call.
+Here a task factory wraps the coroutine of every task it creates,
+and every step of the task (every `send`/`throw` the task makes into it)
+is timed with `time.thread_time_ns`, the CPU time of our thread.
+Between two steps the task is suspended, waiting for I/O, a sleep or
+another task, and we add that time up too.
+
+The profile is flat, by the name of the task's coroutine:
+tasks, steps, CPU time, suspensions and suspended time.
+
+Only a `sample_rate` of the tasks is profiled, the rest run untouched,
+so it's cheap enough to leave on. A task factory works on 3.11,
+on 3.12+ `sys.monitoring` could do the same without wrapping the coroutine.
+
+    profiler = TaskProfiler()
+    profiler.start()
+    ...
+    profiler.print_profile()
+
+    python -m task_profiler
+"""
+import asyncio
+import json
+import random
+from collections.abc import Coroutine
+from time import perf_counter_ns, thread_time_ns
+from typing import Callable, Dict, Optional
+
+
+class TaskStats:
+    def __init__(self):
+        self.tasks = 0
+        self.steps = 0
+        self.cpu_ns = 0
+        self.suspensions = 0
+        self.suspended_ns = 0
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "tasks": self.tasks,
+            "steps": self.steps,
+            "cpu_ns": self.cpu_ns,
+            "suspensions": self.suspensions,
+            "suspended_ns": self.suspended_ns,
+        }
+
+
+class ProfiledCoroutine:
+    """
+    Looks like the coroutine it wraps to the task,
+    but times every step into `stats`
+    """
+
+    __slots__ = ("coro", "stats", "suspended_at")
+
+    def __init__(self, coro: Coroutine, stats: TaskStats):
+        self.coro = coro
+        self.stats = stats
+        self.suspended_at = 0
+
+    def send(self, value):
+        return self.step(self.coro.send, value)
+
+    def throw(self, *args):
+        return self.step(self.coro.throw, *args)
+
+    def close(self) -> None:
+        self.coro.close()
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+    def __getattr__(self, name: str):
+        # `__qualname__`, `cr_frame` and co for the task's repr and stack
+        return getattr(self.coro, name)
+
+    def step(self, method: Callable, *args):
+        stats = self.stats
+        if self.suspended_at:
+            stats.suspended_ns += perf_counter_ns() - self.suspended_at
+        start = thread_time_ns()
+        try:
+            result = method(*args)
+        except BaseException:
+            # `StopIteration` too: the coroutine is done
+            self.suspended_at = 0
+            raise
+        else:
+            stats.suspensions += 1
+            self.suspended_at = perf_counter_ns()
+            return result
+        finally:
+            stats.steps += 1
+            stats.cpu_ns += thread_time_ns() - start
+
+
+Coroutine.register(ProfiledCoroutine)
+
+
+class TaskProfiler:
+    def __init__(self, sample_rate: float = 1.0):
+        self.sample_rate = sample_rate
+        self.stats: Dict[str, TaskStats] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.original_factory: Optional[Callable] = None
+
+    def start(self) -> None:
+        """
+        Profile the tasks created from now on in the running loop
+        """
+        self.loop = asyncio.get_running_loop()
+        self.original_factory = self.loop.get_task_factory()
+        self.loop.set_task_factory(self.task_factory)
+
+    def stop(self) -> None:
+        if self.loop is not None:
+            self.loop.set_task_factory(self.original_factory)
+            self.loop = None
+
+    def task_factory(self, loop: asyncio.AbstractEventLoop, coro, **kwargs):
+        if random.random() < self.sample_rate:
+            name = getattr(coro, "__qualname__", type(coro).__name__)
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = TaskStats()
+            stats.tasks += 1
+            coro = ProfiledCoroutine(coro, stats)
+        if self.original_factory is not None:
+            return self.original_factory(loop, coro, **kwargs)
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+    def profile(self) -> Dict[str, Dict[str, int]]:
+        """
+        The flat profile, by coroutine name, the most CPU first
+        """
+        return {
+            name: stats.summary()
+            for name, stats in sorted(
+                self.stats.items(), key=lambda item: -item[1].cpu_ns
+            )
+        }
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as file:
+            json.dump(self.profile(), file, indent=2)
+
+    def print_profile(self) -> None:
+        print(
+            f"{'coroutine':<40} {'tasks':>6} {'steps':>7} {'cpu ms':>9}"
+            f" {'suspensions':>11} {'suspended ms':>12} {'cpu %':>6}"
+        )
+        for name, stats in self.profile().items():
+            total = stats["cpu_ns"] + stats["suspended_ns"]
+            cpu_percent = 100 * stats["cpu_ns"] / total if total else 0
+            print(
+                f"{name:<40} {stats['tasks']:>6} {stats['steps']:>7}"
+                f" {stats['cpu_ns'] / 1e6:>9.3f} {stats['suspensions']:>11}"
+                f" {stats['suspended_ns'] / 1e6:>12.3f} {cpu_percent:>6.1f}"
+            )
+
+
+async def measure_overhead(tasks: int = 2000, steps: int = 50) -> None:
+    """
+    The same tasks without the profiler, with every task profiled
+    and with 1% of them
+    """
+
+    async def worker() -> None:
+        for _ in range(steps):
+            await asyncio.sleep(0)
+
+    timings = {}
+    for name, sample_rate in {"off": None, "all": 1.0, "1%": 0.01}.items():
+        profiler = TaskProfiler(sample_rate or 0)
+        if sample_rate is not None:
+            profiler.start()
+        start = perf_counter_ns()
+        await asyncio.gather(*[worker() for _ in range(tasks)])
+        timings[name] = (perf_counter_ns() - start) / (tasks * steps)
+        profiler.stop()
+        print(f"{name:<4} {timings[name]:>8.0f} ns/step")
+    print(f"profiling: {timings['all'] - timings['off']:.0f} ns/step")
+
+
+async def main():
+    from ch01.thread_issue_demo import fib
+    from tools import delay
+
+    async def compute(number: int) -> int:
+        await asyncio.sleep(0.1)
+        return fib(number)
+
+    profiler = TaskProfiler()
+    profiler.start()
+    await asyncio.gather(delay(1), delay(1), compute(25), compute(27))
+    profiler.stop()
+    profiler.print_profile()
+    await measure_overhead()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,224 @@
+"""
+Timeouts on a hierarchical timing wheel.
+
+Every `wait_for` or `ClientTimeout` is a `TimerHandle` in the event loop's
+heap: a push is O(log n), and a cancelled handle stays in the heap until the
+loop cleans it up. With 100k connections, each with an idle and a request
+timeout that we keep cancelling and re-arming, that churn adds up.
+
+A timing wheel splits the time in ticks of `tick` seconds. Level 0 has a
+bucket for each of the next `2 ** bits` ticks, each bucket of level 1
+covers `2 ** bits` ticks of level 0, and so on. Scheduling puts the timer in
+the bucket of its tick and cancelling removes it, both O(1).
+When level 0 goes around, the next bucket of level 1 is spread over
+level 0 (cascading). The wheel has a single timer of its own in the loop,
+for the next tick with something to do.
+
+The price: a timer fires up to one `tick` late.
+
+    async with timeout(5):
+        await fetch()
+
+    await wait_for(fetch(), 5)
+"""
+import asyncio
+import math
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class Timer:
+    __slots__ = ("wheel", "when", "callback", "args", "bucket")
+
+    def __init__(self, wheel: "TimerWheel", when: int, callback, args):
+        self.wheel = wheel
+        # the tick it fires on
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.bucket: Optional[Dict] = None
+
+    def cancel(self) -> None:
+        if self.bucket is not None:
+            del self.bucket[self]
+            self.bucket = None
+            self.wheel.count -= 1
+
+    def cancelled(self) -> bool:
+        return self.bucket is None
+
+
+class TimerWheel:
+    def __init__(
+        self,
+        tick: float = 0.01,
+        bits: int = 8,
+        levels: int = 4,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        self.loop = loop or asyncio.get_running_loop()
+        self.tick = tick
+        self.bits = bits
+        self.levels = levels
+        self.mask = (1 << bits) - 1
+        # insertion ordered dicts as O(1) sets
+        self.wheels: List[List[Dict[Timer, None]]] = [
+            [{} for _ in range(1 << bits)] for _ in range(levels)
+        ]
+        # the last tick we processed
+        self.current = int(self.loop.time() / tick)
+        self.count = 0
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.next_tick = 0
+
+    def call_later(self, delay: float, callback: Callable, *args) -> Timer:
+        now = self.loop.time()
+        if not self.count:
+            # nothing to process since the last tick, catch up
+            self.current = int(now / self.tick)
+        when = math.ceil((now + delay) / self.tick)
+        timer = Timer(self, when, callback, args)
+        # we are past the bucket of the current tick
+        self.insert(timer, self.current + 1)
+        self.count += 1
+        if self.handle is not None and when < self.next_tick:
+            # sooner than what the loop will wake us up for
+            self.handle.cancel()
+            self.handle = None
+        self.schedule()
+        return timer
+
+    def insert(self, timer: Timer, earliest: int) -> None:
+        """
+        Put `timer` in the bucket of its tick, or of `earliest` if it's due
+        """
+        bits = self.bits
+        when = max(timer.when, earliest)
+        delta = when - self.current
+        level = 0
+        while level < self.levels - 1 and delta >> (bits * (level + 1)):
+            level += 1
+        # further than the wheel goes: park it in the last bucket,
+        # we'll insert it again when we get there
+        when = min(when, self.current + (1 << (bits * self.levels)) - 1)
+        bucket = self.wheels[level][(when >> (bits * level)) & self.mask]
+        bucket[timer] = None
+        timer.bucket = bucket
+
+    def schedule(self) -> None:
+        """
+        Make sure the loop calls `advance` for the next tick with something
+        to do: a timer in level 0 or a cascade from level 1
+        """
+        if self.handle is not None or not self.count:
+            return
+        level_0 = self.wheels[0]
+        next_tick = (self.current | self.mask) + 1
+        for tick in range(self.current + 1, next_tick):
+            if level_0[tick & self.mask]:
+                next_tick = tick
+                break
+        self.next_tick = next_tick
+        self.handle = self.loop.call_at(next_tick * self.tick, self.advance)
+
+    def advance(self) -> None:
+        self.handle = None
+        bits = self.bits
+        # the loop can call us a hair before the tick
+        target = int((self.loop.time() + 1e-6) / self.tick)
+        while self.current < target and self.count:
+            self.current += 1
+            current = self.current
+            level = 1
+            while level < self.levels and not current & (
+                (1 << (bits * level)) - 1
+            ):
+                bucket = self.wheels[level][
+                    (current >> (bits * level)) & self.mask
+                ]
+                timers = list(bucket)
+                bucket.clear()
+                for timer in timers:
+                    self.insert(timer, current)
+                level += 1
+            bucket = self.wheels[0][current & self.mask]
+            if bucket:
+                timers = list(bucket)
+                bucket.clear()
+                for timer in timers:
+                    if timer.when > current:
+                        # a parked timer, still too far
+                        self.insert(timer, current + 1)
+                        continue
+                    timer.bucket = None
+                    self.count -= 1
+                    self.fire(timer)
+        self.current = max(self.current, target)
+        self.schedule()
+
+    def fire(self, timer: Timer) -> None:
+        try:
+            timer.callback(*timer.args)
+        except Exception as ex:
+            self.loop.call_exception_handler(
+                {"message": "Exception in a timer callback", "exception": ex}
+            )
+
+
+wheels: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TimerWheel]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_wheel() -> TimerWheel:
+    """
+    The wheel of the running loop, created on the first call
+    """
+    loop = asyncio.get_running_loop()
+    wheel = wheels.get(loop)
+    if wheel is None:
+        wheel = wheels[loop] = TimerWheel(loop=loop)
+    return wheel
+
+
+class Timeout:
+    """
+    `asyncio.timeout` on the timer wheel: cancel the current task after
+    `delay` seconds and turn its `CancelledError` into a `TimeoutError`
+    """
+
+    def __init__(self, delay: Optional[float]):
+        self.delay = delay
+        self.timer: Optional[Timer] = None
+        self.expired = False
+
+    async def __aenter__(self) -> "Timeout":
+        self.task = asyncio.current_task()
+        # a cancellation that was requested before us isn't ours
+        self.cancelling = self.task.cancelling()
+        if self.delay is not None:
+            self.timer = get_wheel().call_later(self.delay, self.expire)
+        return self
+
+    def expire(self) -> None:
+        self.expired = True
+        self.task.cancel()
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.expired and self.task.uncancel() <= self.cancelling:
+            if exc_type is asyncio.CancelledError:
+                raise TimeoutError from exc
+
+
+def timeout(delay: Optional[float]) -> Timeout:
+    return Timeout(delay)
+
+
+async def wait_for(aw: Awaitable, delay: Optional[float]) -> Any:
+    """
+    `asyncio.wait_for` on the timer wheel, `aw` is cancelled on a timeout
+    """
+    async with timeout(delay):
+        return await aw
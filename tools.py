@@ -2,8 +2,11 @@
 import asyncio
 import time
 from functools import wraps
+from time import perf_counter_ns
 from typing import Callable
 
+from metrics import get_histogram
+
 
 async def delay(delay_seconds: int) -> int:
     print(f"`delay`: sleeping for {delay_seconds} second(s)")
@@ -12,8 +15,17 @@ async def delay(delay_seconds: int) -> int:
     return delay_seconds
 
 
-def async_timed():
+def async_timed(metrics: bool = False):
+    """
+    Print how long each call of the decorated coroutine took,
+    or with `metrics=True` record it in a latency histogram
+    that we can read with `metrics.snapshot()`
+    """
+
     def outer(func: Callable) -> Callable:
+        if metrics:
+            return histogram_timed(func)
+
         @wraps(func)
         async def inner(*args, **kwargs) -> Callable:
             print(f"Starting func with: {args} {kwargs}")
@@ -28,3 +40,20 @@ def async_timed():
         return inner
 
     return outer
+
+
+def histogram_timed(func: Callable) -> Callable:
+    histogram = get_histogram(f"{func.__module__}.{func.__qualname__}")
+
+    @wraps(func)
+    async def inner(*args, **kwargs) -> Callable:
+        start = perf_counter_ns()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            histogram.errors += 1
+            raise
+        finally:
+            histogram.record(perf_counter_ns() - start)
+
+    return inner
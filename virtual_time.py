@@ -0,0 +1,84 @@
+"""
+An event loop with a virtual clock, so the demos that spend their time in
+`asyncio.sleep` run in milliseconds.
+
+The loop's `time()` is a counter that only moves when the loop would
+otherwise sleep: when nothing is ready, the loop asks the selector to wait
+until the next timer, and instead of waiting we poll the sockets and move
+the clock straight to that timer.
+Everything else is the plain `SelectorEventLoop`, timers fire in the same
+order and at the same (virtual) times, so `wait_for`, `shield`,
+`as_completed` and timeouts behave exactly as with the real clock.
+
+What the virtual clock can't see:
+- `time.time()`/`time.monotonic()`, use `loop.time()` to measure
+- work in threads or processes and real network I/O, while they are
+  pending the clock jumps to the next timer without waiting for them
+
+    virtual_time.run(main())
+
+    python -m virtual_time
+    python -m pytest ch04/test_virtual_time.py
+"""
+import asyncio
+import selectors
+import time
+from typing import Any, Coroutine, List, Optional, Tuple
+
+
+class VirtualClockSelector:
+    """
+    Wraps the loop's selector: never waits, advances the clock instead
+    """
+
+    def __init__(self, selector: selectors.BaseSelector, loop):
+        self.selector = selector
+        self.loop = loop
+
+    def select(self, timeout: Optional[float] = None) -> List[Tuple]:
+        if timeout is None:
+            # no timers, only real I/O can wake us up
+            return self.selector.select(None)
+        events = self.selector.select(0)
+        if not events and timeout > 0:
+            self.loop.advance(timeout)
+        return events
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.selector, name)
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        super().__init__()
+        self.virtual_time = 0.0
+        self._selector = VirtualClockSelector(self._selector, self)
+
+    def time(self) -> float:
+        return self.virtual_time
+
+    def advance(self, seconds: float) -> None:
+        self.virtual_time += seconds
+
+
+def run(main: Coroutine, debug: Optional[bool] = None) -> Any:
+    """
+    `asyncio.run` with a `VirtualTimeEventLoop`
+    """
+    with asyncio.Runner(
+        debug=debug, loop_factory=VirtualTimeEventLoop
+    ) as runner:
+        return runner.run(main)
+
+
+def main() -> None:
+    from ch02 import shield_delayed_tasks, timeout_tasks_demo
+
+    for demo in [timeout_tasks_demo.main, shield_delayed_tasks.main]:
+        start = time.perf_counter()
+        run(demo())
+        print(f"{demo.__module__} took {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()